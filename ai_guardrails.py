@@ -8,6 +8,7 @@ import time
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 import logging
+from background_tasks import submit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -419,7 +420,8 @@ class AIGuardrails:
             'details': details
         }
         self.audit_log.append(audit_entry)
-        logger.info(f"Audit event: {event_type} - {details}")
+        # Formatting and emitting the log line happens on the background worker
+        submit(logger.info, "Audit event: %s - %s", event_type, details)
     
     def get_audit_log(self, start_time: Optional[datetime] = None) -> List[Dict]:
         """
@@ -5,10 +5,14 @@ Enhanced version with persistent usage tracking and rate limiting
 
 import re
 import time
+from collections import Counter
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 import logging
-from sqlalchemy import text
+from sqlalchemy import inspect, text
+from sqlalchemy.orm.attributes import set_committed_value
+from flask import g, has_app_context
+from background_tasks import submit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -67,12 +71,58 @@ class AIGuardrailsPersistent:
         'credit_card': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
     }
     
+    # Compiled once at import: every injection pattern joined into a single
+    # alternation (one named group per pattern) so input is scanned in one pass
+    _MALICIOUS_RE = re.compile('|'.join(
+        f'(?P<p{index}>{pattern})' for index, pattern in enumerate(MALICIOUS_PATTERNS)
+    ))
+    _PII_RES = {pii_type: re.compile(pattern) for pii_type, pattern in PII_PATTERNS.items()}
+    _TAG_RE = re.compile(r'<[^>]+>')
+    _WHITESPACE_RE = re.compile(r'\s+')
+    
     # Bias detection keywords
     BIAS_KEYWORDS = {
-        'gender': ['he', 'she', 'him', 'her', 'his', 'hers', 'male', 'female', 'man', 'woman'],
-        'age': ['young', 'old', 'elderly', 'millennial', 'boomer'],
-        'cultural': ['foreign', 'exotic', 'traditional', 'modern'],
-        'socioeconomic': ['poor', 'rich', 'wealthy', 'underprivileged']
+        'gender': frozenset(['he', 'she', 'him', 'her', 'his', 'hers', 'male', 'female', 'man', 'woman']),
+        'age': frozenset(['young', 'old', 'elderly', 'millennial', 'boomer']),
+        'cultural': frozenset(['foreign', 'exotic', 'traditional', 'modern']),
+        'socioeconomic': frozenset(['poor', 'rich', 'wealthy', 'underprivileged'])
+    }
+    
+    # Inappropriate content keywords
+    INAPPROPRIATE_KEYWORDS = (
+        'profanity', 'offensive', 'discriminatory', 'hate speech',
+        'violent', 'explicit', 'illegal', 'unethical'
+    )
+    
+    # Professional vocabulary used by the quality score
+    PROFESSIONAL_INDICATORS = (
+        'project', 'management', 'stakeholder', 'deliverable',
+        'milestone', 'objective', 'strategy', 'implementation'
+    )
+    
+    # Fallback content when AI generation is unavailable or fails validation
+    FALLBACK_TEMPLATES = {
+        'project_charter': "Professional project charter template with PMI standards...",
+        'risk_register': "Comprehensive risk register following industry best practices...",
+        'default': "Professional project management template..."
+    }
+    
+    # AI usage disclosure attached to every response
+    AI_DISCLOSURE = {
+        'ai_generated': True,
+        'disclosure': "This content was generated with AI assistance and reviewed for quality and safety.",
+        'limitations': [
+            "AI-generated content should be reviewed by professionals",
+            "Content may require customization for specific use cases",
+            "Human oversight is recommended for critical decisions"
+        ],
+        'safety_measures': [
+            "Content filtered for safety and appropriateness",
+            "Bias detection and mitigation applied",
+            "Quality assurance validation performed",
+            "Privacy protection measures enforced",
+            "Usage limits enforced per subscription tier"
+        ]
     }
     
     def __init__(self, db_session=None):
@@ -108,7 +158,12 @@ class AIGuardrailsPersistent:
                      template_type: str = None, tokens_used: int = 0,
                      input_length: int = 0, output_length: int = 0,
                      error_message: str = None, metadata: dict = None):
-        """Log AI usage to database"""
+        """
+        Add an AI usage row to the current transaction.
+
+        The row is not committed here: the caller commits once at the end of the
+        request, together with the usage counter update.
+        """
         if not self.db:
             logger.warning("Database session not available for AI usage logging")
             return
@@ -140,7 +195,6 @@ class AIGuardrailsPersistent:
             """)
             
             self.db.execute(insert_sql, log_entry)
-            self.db.commit()
             
             logger.info(f"Logged AI usage for user {user_id}: {request_type}")
             
@@ -260,34 +314,50 @@ class AIGuardrailsPersistent:
         return False
     
     def increment_usage(self, user):
-        """Increment user's monthly AI usage counter"""
-        user.ai_generations_used_this_month = (user.ai_generations_used_this_month or 0) + 1
+        """
+        Increment user's monthly AI usage counter.
+
+        The increment is a single UPDATE ... RETURNING, so two concurrent
+        generations cannot both read the same value and lose a count.
+        """
+        new_count = None
+        if self.db:
+            try:
+                with self.db.begin_nested():
+                    new_count = self.db.execute(text("""
+                        UPDATE users
+                        SET ai_generations_used_this_month = COALESCE(ai_generations_used_this_month, 0) + 1
+                        WHERE id = :user_id
+                        RETURNING ai_generations_used_this_month
+                    """), {'user_id': user.id}).scalar()
+            except Exception as e:
+                logger.error(f"Error incrementing AI usage: {e}")
+        
+        if new_count is None:
+            user.ai_generations_used_this_month = (user.ai_generations_used_this_month or 0) + 1
+        else:
+            _set_loaded_value(user, 'ai_generations_used_this_month', new_count)
         logger.info(f"User {user.id} AI usage: {user.ai_generations_used_this_month}/{self.MONTHLY_LIMITS.get(user.subscription_plan, 3)}")
     
     # ========== CONTENT SAFETY (from original) ==========
     
     def detect_malicious_prompt(self, text: str) -> Tuple[bool, Optional[str]]:
         """Detect malicious prompt injection attempts"""
-        text_lower = text.lower()
-        
-        for pattern in self.MALICIOUS_PATTERNS:
-            if re.search(pattern, text_lower):
-                reason = f"Detected potential prompt injection: {pattern}"
-                logger.warning(f"Malicious prompt detected: {reason}")
-                self._log_audit_event('malicious_prompt_detected', {'pattern': pattern})
-                return True, reason
+        match = self._MALICIOUS_RE.search(text.lower())
+        
+        if match:
+            pattern = self.MALICIOUS_PATTERNS[int(match.lastgroup[1:])]
+            reason = f"Detected potential prompt injection: {pattern}"
+            logger.warning(f"Malicious prompt detected: {reason}")
+            self._log_audit_event('malicious_prompt_detected', {'pattern': pattern})
+            return True, reason
                 
         return False, None
     
     def detect_inappropriate_content(self, text: str) -> Tuple[bool, Optional[str]]:
         """Detect inappropriate or unprofessional content"""
-        inappropriate_keywords = [
-            'profanity', 'offensive', 'discriminatory', 'hate speech',
-            'violent', 'explicit', 'illegal', 'unethical'
-        ]
-        
         text_lower = text.lower()
-        for keyword in inappropriate_keywords:
+        for keyword in self.INAPPROPRIATE_KEYWORDS:
             if keyword in text_lower:
                 reason = f"Detected inappropriate content: {keyword}"
                 logger.warning(f"Inappropriate content detected: {reason}")
@@ -300,12 +370,11 @@ class AIGuardrailsPersistent:
         """Remove personally identifiable information (PII) from text"""
         scrubbed_text = text
         
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            matches = re.findall(pattern, scrubbed_text)
-            if matches:
-                logger.info(f"Scrubbing {len(matches)} {pii_type} instances")
-                self._log_audit_event('pii_scrubbed', {'type': pii_type, 'count': len(matches)})
-                scrubbed_text = re.sub(pattern, f'[{pii_type.upper()}_REDACTED]', scrubbed_text)
+        for pii_type, regex in self._PII_RES.items():
+            scrubbed_text, count = regex.subn(f'[{pii_type.upper()}_REDACTED]', scrubbed_text)
+            if count:
+                logger.info(f"Scrubbing {count} {pii_type} instances")
+                self._log_audit_event('pii_scrubbed', {'type': pii_type, 'count': count})
         
         return scrubbed_text
     
@@ -330,8 +399,8 @@ class AIGuardrailsPersistent:
     def sanitize_input(self, text: str) -> str:
         """Sanitize input text"""
         sanitized = self.scrub_pii(text)
-        sanitized = re.sub(r'<[^>]+>', '', sanitized)
-        sanitized = re.sub(r'\s+', ' ', sanitized).strip()
+        sanitized = self._TAG_RE.sub('', sanitized)
+        sanitized = self._WHITESPACE_RE.sub(' ', sanitized).strip()
         return sanitized
     
     # ========== QUALITY AND BIAS (from original) ==========
@@ -345,20 +414,23 @@ class AIGuardrailsPersistent:
         if total_words == 0:
             return {}
         
+        # Count every word once, then look up each keyword, instead of
+        # rescanning the whole output for every bias type
+        word_counts = Counter(words)
         bias_scores = {}
         for bias_type, keywords in self.BIAS_KEYWORDS.items():
-            keyword_count = sum(1 for word in words if word in keywords)
-            bias_score = keyword_count / total_words if total_words > 0 else 0
-            bias_scores[bias_type] = bias_score
+            keyword_count = sum(word_counts[keyword] for keyword in keywords)
+            bias_scores[bias_type] = keyword_count / total_words
         
         return bias_scores
     
     def assess_quality(self, text: str, context: Dict) -> Dict[str, float]:
         """Multi-metric quality assessment"""
+        text_lower = text.lower()
         scores = {
             'completeness': self._assess_completeness(text, context),
-            'relevance': self._assess_relevance(text, context),
-            'professionalism': self._assess_professionalism(text),
+            'relevance': self._assess_relevance(text_lower, context),
+            'professionalism': self._assess_professionalism(text_lower),
             'clarity': self._assess_clarity(text)
         }
         scores['overall'] = sum(scores.values()) / len(scores)
@@ -371,21 +443,15 @@ class AIGuardrailsPersistent:
         structure_score = 1.0 if has_sections else 0.5
         return (length_score + structure_score) / 2
     
-    def _assess_relevance(self, text: str, context: Dict) -> float:
+    def _assess_relevance(self, text_lower: str, context: Dict) -> float:
         key_terms = context.get('key_terms', [])
         if not key_terms:
             return 0.9
-        text_lower = text.lower()
         matches = sum(1 for term in key_terms if term.lower() in text_lower)
         return matches / len(key_terms) if key_terms else 0.9
     
-    def _assess_professionalism(self, text: str) -> float:
-        professional_indicators = [
-            'project', 'management', 'stakeholder', 'deliverable',
-            'milestone', 'objective', 'strategy', 'implementation'
-        ]
-        text_lower = text.lower()
-        matches = sum(1 for indicator in professional_indicators if indicator in text_lower)
+    def _assess_professionalism(self, text_lower: str) -> float:
+        matches = sum(1 for indicator in self.PROFESSIONAL_INDICATORS if indicator in text_lower)
         return min(matches / 5, 1.0)
     
     def _assess_clarity(self, text: str) -> float:
@@ -410,37 +476,18 @@ class AIGuardrailsPersistent:
             'details': details
         }
         self.in_memory_audit_log.append(audit_entry)
-        logger.info(f"Audit event: {event_type} - {details}")
+        # Formatting and emitting the log line happens on the background worker
+        submit(logger.info, "Audit event: %s - %s", event_type, details)
     
     # ========== FALLBACK AND TRANSPARENCY ==========
     
     def get_fallback_content(self, content_type: str) -> str:
         """Provide fallback content when AI generation fails"""
-        fallback_templates = {
-            'project_charter': "Professional project charter template with PMI standards...",
-            'risk_register': "Comprehensive risk register following industry best practices...",
-            'default': "Professional project management template..."
-        }
-        return fallback_templates.get(content_type, fallback_templates['default'])
+        return self.FALLBACK_TEMPLATES.get(content_type, self.FALLBACK_TEMPLATES['default'])
     
     def get_ai_disclosure(self) -> Dict:
         """Provide transparent AI usage disclosure"""
-        return {
-            'ai_generated': True,
-            'disclosure': "This content was generated with AI assistance and reviewed for quality and safety.",
-            'limitations': [
-                "AI-generated content should be reviewed by professionals",
-                "Content may require customization for specific use cases",
-                "Human oversight is recommended for critical decisions"
-            ],
-            'safety_measures': [
-                "Content filtered for safety and appropriateness",
-                "Bias detection and mitigation applied",
-                "Quality assurance validation performed",
-                "Privacy protection measures enforced",
-                "Usage limits enforced per subscription tier"
-            ]
-        }
+        return self.AI_DISCLOSURE
     
     # ========== COMPLETE VALIDATION PIPELINES ==========
     
@@ -530,8 +577,29 @@ class AIGuardrailsPersistent:
         return result
 
 
+def _set_loaded_value(obj, key: str, value):
+    """Set an attribute to a value already stored in the database, without marking it dirty"""
+    state = inspect(obj, raiseerr=False)
+    if state is not None and key in state.mapper.column_attrs:
+        set_committed_value(obj, key, value)
+    else:
+        setattr(obj, key, value)
+
+
 # Factory function to create guardrails instance with database session
 def create_guardrails(db_session=None):
-    """Create AI guardrails instance with database session"""
-    return AIGuardrailsPersistent(db_session)
+    """
+    Create AI guardrails instance with database session.
+
+    Inside a Flask request the instance is memoized on flask.g, so every caller in
+    the same request shares one instance and one audit log.
+    """
+    if not has_app_context():
+        return AIGuardrailsPersistent(db_session)
+    
+    guardrails = g.get('ai_guardrails')
+    if guardrails is None or guardrails.db is not db_session:
+        guardrails = AIGuardrailsPersistent(db_session)
+        g.ai_guardrails = guardrails
+    return guardrails
 
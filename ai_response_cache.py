@@ -0,0 +1,186 @@
+"""
+PMBlueprints AI Response Cache
+Caches validated OpenAI completions so repeated generation requests skip the API call
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+try:
+    from monitoring import track_cache_hit, track_cache_miss
+except ImportError:
+    # Monitoring is optional
+    def track_cache_hit():
+        pass
+
+    def track_cache_miss():
+        pass
+
+logger = logging.getLogger(__name__)
+
+
+class AIResponseCache:
+    """
+    TTL + LRU cache for generated template content.
+
+    Entries are keyed on the normalized (template_type, industry, input) request, so
+    only a request with the same input reuses a completion. Near-duplicate inputs are
+    deliberately not matched: the cache is shared across users, and a similar
+    description can differ in names, figures or a negation.
+
+    Entries live in process memory; when REDIS_URL is set they are also written to
+    Redis so every worker process shares hits.
+    """
+
+    DEFAULT_MAXSIZE = 2048
+    DEFAULT_TTL = 86400  # 24 hours
+    REDIS_PREFIX = 'pmb:ai-response:'
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: int = DEFAULT_TTL, redis_url: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, content)
+        self._lock = threading.Lock()
+        self._redis = None
+
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"AI response cache falling back to in-process only: {e}")
+
+    @staticmethod
+    def make_key(template_type: str, industry: str, sanitized_input: str) -> str:
+        """Cache key for a normalized (template_type, industry, input) request"""
+        normalized = '|'.join(_normalize(part) for part in (template_type, industry, sanitized_input))
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached content for key, or None on a miss"""
+        content = self._get_exact(key)
+        _track(content is not None)
+        return content
+
+    def set(self, key: str, content: str) -> None:
+        """Store validated content under key"""
+        self._set_local(key, content)
+        if self._redis is not None:
+            try:
+                self._redis.setex(self.REDIS_PREFIX + key, self.ttl, content)
+            except Exception as e:
+                logger.warning(f"AI response cache Redis write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all in-process entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def _get_exact(self, key: str) -> Optional[str]:
+        """Process memory first, then Redis"""
+        content = self._get_local(key)
+
+        if content is None and self._redis is not None:
+            try:
+                value = self._redis.get(self.REDIS_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"AI response cache Redis read failed: {e}")
+                value = None
+            if value is not None:
+                content = value.decode('utf-8')
+                self._set_local(key, content)
+
+        return content
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, content = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def _set_local(self, key: str, content: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class RequestCoalescer:
+    """
+    Collapses concurrent identical generation requests onto a single upstream call.
+
+    The first thread to ask for a key runs the call; threads that arrive with the
+    same key while it is in flight wait for it and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _InFlightCall
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() once per in-flight key.
+
+        Returns (result, shared) where shared is True when the result came from
+        another thread's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class _InFlightCall:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace and case so trivially different requests share a key"""
+    return ' '.join(text.split()).lower()
+
+
+def _track(hit: bool) -> None:
+    """Report the lookup to the monitoring cache counters"""
+    if hit:
+        track_cache_hit()
+    else:
+        track_cache_miss()
+
+
+# Global cache instance shared by the AI generation routes
+response_cache = AIResponseCache(redis_url=os.environ.get('REDIS_URL'))
@@ -0,0 +1,44 @@
+"""
+PMBlueprints Background Tasks
+Runs fire-and-forget side effects (monitoring counters, audit log lines) on a
+worker thread so they stay off the response path
+"""
+
+import os
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_QUEUE = queue.SimpleQueue()
+_worker_lock = threading.Lock()
+_worker_pid = None
+
+
+def submit(fn, *args, **kwargs):
+    """Queue fn(*args, **kwargs) to run on the background worker"""
+    _ensure_worker()
+    _QUEUE.put((fn, args, kwargs))
+
+
+def _ensure_worker():
+    """Start the worker once per process (threads do not survive gunicorn's fork)"""
+    global _worker_pid
+    pid = os.getpid()
+    if _worker_pid == pid:
+        return
+    with _worker_lock:
+        if _worker_pid == pid:
+            return
+        threading.Thread(target=_drain, name='background-tasks', daemon=True).start()
+        _worker_pid = pid
+
+
+def _drain():
+    while True:
+        fn, args, kwargs = _QUEUE.get()
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Background task {getattr(fn, '__name__', fn)} failed: {e}")
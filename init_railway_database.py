@@ -117,6 +117,7 @@ print(f"Found {len(templates)} templates in catalog")
 # Prepare template data for bulk insert
 template_data = []
 for template in templates:
+    tags = template.get('tags') or ()
     template_data.append((
         template.get('name', ''),
         template.get('description', ''),
@@ -128,7 +129,7 @@ for template in templates:
         None,  # preview_image
         0,  # downloads
         4.5,  # rating
-        ','.join(template.get('tags', [])) if template.get('tags') else '',
+        tags if isinstance(tags, str) else ','.join(tags),
         template.get('file_size', 0),
         template.get('has_formulas', False),
         template.get('has_fields', False),
@@ -117,6 +117,7 @@ class Template(db.Model):
 class DownloadHistory(db.Model):
     """Download history model"""
     __tablename__ = 'download_history'
+    __table_args__ = (db.Index('idx_download_history_user_date', 'user_id', 'download_date'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -129,6 +130,7 @@ class DownloadHistory(db.Model):
 class AIGeneratorHistory(db.Model):
     """AI Generator history model"""
     __tablename__ = 'ai_generator_history'
+    __table_args__ = (db.Index('idx_ai_generator_history_user_created', 'user_id', 'created_at'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -145,9 +147,37 @@ class AIGeneratorHistory(db.Model):
     def __repr__(self):
         return f'<AIGeneration {self.id}:{self.document_type}>'
 
+class AIGeneratorBatch(db.Model):
+    """AI Generator request queued on the OpenAI Batch API
+
+    Kept out of ai_generator_history so queued and failed requests are neither listed
+    as documents nor counted against the monthly quota; the history row is written
+    only once the batch succeeds.
+    """
+    __tablename__ = 'ai_generator_batches'
+    __table_args__ = (db.Index('idx_ai_generator_batches_user_status', 'user_id', 'status'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    batch_id = db.Column(db.String(100))
+    status = db.Column(db.String(20), default='pending')  # pending, completed, failed, expired, cancelled
+    project_name = db.Column(db.String(255))
+    project_type = db.Column(db.String(100))
+    industry = db.Column(db.String(100))
+    methodology = db.Column(db.String(50))
+    document_type = db.Column(db.String(100))
+    file_format = db.Column(db.String(20))
+    history_id = db.Column(db.Integer, db.ForeignKey('ai_generator_history.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<AIGeneratorBatch {self.id}:{self.status}>'
+
 class AISuggestionHistory(db.Model):
     """AI Suggestion history model"""
     __tablename__ = 'ai_suggestion_history'
+    __table_args__ = (db.Index('idx_ai_suggestion_history_user_created', 'user_id', 'created_at'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -161,9 +191,30 @@ class AISuggestionHistory(db.Model):
     def __repr__(self):
         return f'<AISuggestion {self.id}>'
 
+class AIUsageLog(db.Model):
+    """AI usage log written by the persistent guardrails (one row per AI request)"""
+    __tablename__ = 'ai_usage_log'
+    __table_args__ = (db.Index('idx_ai_usage_user_timestamp', 'user_id', 'timestamp'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    request_type = db.Column(db.String(50), nullable=False)
+    template_type = db.Column(db.String(100))
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    success = db.Column(db.Boolean, default=True)
+    tokens_used = db.Column(db.Integer, default=0)
+    input_length = db.Column(db.Integer)
+    output_length = db.Column(db.Integer)
+    error_message = db.Column(db.Text)
+    metadata_json = db.Column('metadata', db.Text)  # 'metadata' is reserved on declarative models
+    
+    def __repr__(self):
+        return f'<AIUsageLog {self.user_id}:{self.request_type}>'
+
 class TemplatePurchase(db.Model):
     """Individual template purchase model - minimal schema matching production DB"""
     __tablename__ = 'template_purchase'
+    __table_args__ = (db.Index('idx_template_purchase_user_purchased', 'user_id', 'purchased_at'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -176,6 +227,7 @@ class TemplatePurchase(db.Model):
 class Payment(db.Model):
     """Payment history model"""
     __tablename__ = 'payments'
+    __table_args__ = (db.Index('idx_payments_user_created', 'user_id', 'created_at'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
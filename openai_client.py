@@ -0,0 +1,56 @@
+"""
+PMBlueprints Shared OpenAI Client
+One client, and so one pooled set of keep-alive HTTPS connections, per process for the AI routes
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing: comfortably above the number of request threads in a gunicorn worker,
+# so concurrent generations reuse warm connections instead of opening new ones
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+KEEPALIVE_EXPIRY = 60  # seconds an idle connection stays warm
+
+# HTTP/2 lets concurrent calls multiplex over a few connections; httpx needs the h2 package for it
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+client = None
+
+if OPENAI_API_KEY:
+    try:
+        import httpx
+        from openai import OpenAI, DefaultHttpxClient
+        client = OpenAI(
+            http_client=DefaultHttpxClient(
+                http2=HTTP2_ENABLED,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY
+                )
+            )
+        )
+        logger.info(f"OpenAI client initialized successfully (HTTP/2: {HTTP2_ENABLED})")
+    except Exception as e:
+        logger.error(f"Failed to initialize OpenAI client: {e}")
+        client = None
+
+AI_ENABLED = client is not None
+
+
+def log_prompt_cache_usage(response, endpoint: str) -> None:
+    """Log how much of a completion's prompt was served from OpenAI's prompt-prefix cache"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = (getattr(details, 'cached_tokens', None) or 0) if details is not None else 0
+    logger.info(f"{endpoint}: prompt_tokens={usage.prompt_tokens} cached_tokens={cached}")
@@ -2,7 +2,8 @@
 Populate production database with templates from templates_catalog.json
 This script will be run as a Vercel serverless function
 """
-import json
+import argparse
+import logging
 import os
 import sys
 from pathlib import Path
@@ -12,78 +13,83 @@ current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
 from app import app, db, Template
+from sqlalchemy import exists
 from sqlalchemy.exc import IntegrityError
+from templates_loader import iter_template_rows
 
-def populate_database():
-    """Populate database with templates from JSON file"""
+BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+def populate_database(force=None):
+    """Populate database with templates from JSON file
+
+    Existing templates are only cleared and reimported when force is True.
+    force defaults to PMBP_FORCE_REIMPORT=1 in the environment, so callers that
+    import this function honour the variable too.
+    """
+    if force is None:
+        force = os.getenv('PMBP_FORCE_REIMPORT') == '1'
     with app.app_context():
         try:
             # Load templates from JSON
             json_path = current_dir / 'templates_catalog.json'
-            with open(json_path, 'r') as f:
-                templates_data = json.load(f)
+            rows = list(iter_template_rows(json_path))
             
-            print(f"Found {len(templates_data)} templates to import")
+            print(f"Found {len(rows)} templates to import")
             
             # Check if database already has templates
-            existing_count = Template.query.count()
-            if existing_count > 0:
-                print(f"Database already contains {existing_count} templates")
-                response = input("Do you want to clear and reimport? (yes/no): ")
-                if response.lower() == 'yes':
-                    Template.query.delete()
-                    db.session.commit()
-                    print("Cleared existing templates")
-                else:
-                    print("Skipping import")
+            already_populated = db.session.query(exists().where(Template.id.isnot(None))).scalar()
+            if already_populated:
+                print("Database already contains templates")
+                if not force:
+                    print("Skipping import (pass --force or set PMBP_FORCE_REIMPORT=1 to reimport)")
                     return
+                Template.query.delete()
+                db.session.commit()
+                print("Cleared existing templates")
             
             # Import templates
             imported = 0
-            skipped = 0
+            skipped_ids = []
             
-            for template_data in templates_data:
+            for start in range(0, len(rows), BATCH_SIZE):
+                batch = rows[start:start + BATCH_SIZE]
                 try:
-                    # Create template object
-                    template = Template(
-                        id=template_data.get("id"),
-                        name=template_data.get("name"),
-                        filename=template_data.get("filename"),
-                        industry=template_data.get("industry"),
-                        category=template_data.get("category"),
-                        file_type=template_data.get("file_type", "xlsx"),
-                        description=template_data.get("description", ""),
-                        downloads=template_data.get("downloads", 0),
-                        rating=template_data.get("rating", 4.5),
-                        tags=",".join(template_data.get("tags", [])),
-                        file_size=template_data.get("file_size"),
-                        has_formulas=template_data.get("has_formulas", False),
-                        has_fields=template_data.get("has_fields", False),
-                        is_premium=template_data.get("is_premium", False),
-                    )
-                    db.session.add(template)
-                    imported += 1
-                    
-                    # Commit in batches of 100
-                    if imported % 100 == 0:
-                        db.session.commit()
-                        print(f"Imported {imported} templates...")
-                        
-                except IntegrityError as e:
+                    db.session.execute(Template.__table__.insert(), batch)
+                    db.session.commit()
+                    imported += len(batch)
+                    print(f"Imported {imported} templates...")
+                except IntegrityError:
+                    # Retry the batch row by row so one duplicate doesn't drop the rest
                     db.session.rollback()
-                    skipped += 1
-                    print(f"Skipped template {template_data.get('id')}: {e}")
+                    for row in batch:
+                        try:
+                            db.session.execute(Template.__table__.insert(), [row])
+                            db.session.commit()
+                            imported += 1
+                        except IntegrityError as e:
+                            db.session.rollback()
+                            skipped_ids.append(row.get('id'))
+                            logger.debug("Skipped template %s: %s", row.get('id'), e)
+                        except Exception as e:
+                            db.session.rollback()
+                            skipped_ids.append(row.get('id'))
+                            logger.debug("Error importing template %s: %s", row.get('id'), e)
                 except Exception as e:
                     db.session.rollback()
-                    skipped += 1
-                    print(f"Error importing template {template_data.get('id')}: {e}")
-            
+                    skipped_ids.extend(row.get('id') for row in batch)
+                    logger.debug("Error importing templates %d-%d: %s", start, start + len(batch), e)
+
             # Final commit
             db.session.commit()
             
             print(f"\n✅ Import complete!")
             print(f"   Imported: {imported} templates")
-            print(f"   Skipped: {skipped} templates")
+            print(f"   Skipped: {len(skipped_ids)} templates")
+            if skipped_ids:
+                more = "..." if len(skipped_ids) > 10 else ""
+                print(f"   Skipped IDs: {skipped_ids[:10]}{more}")
             print(f"   Total in database: {Template.query.count()} templates")
             
             # Show some statistics
@@ -101,5 +107,9 @@ def populate_database():
             traceback.print_exc()
 
 if __name__ == '__main__':
-    populate_database()
+    parser = argparse.ArgumentParser(description='Populate the templates table from templates_catalog.json')
+    parser.add_argument('--force', action='store_true',
+                        help='clear existing templates and reimport')
+    args = parser.parse_args()
+    populate_database(force=args.force or None)
 
@@ -2,24 +2,53 @@
 FIXED: Batch generate screenshots for all 955 templates
 - Excel files: Capture the DATA sheet (NOT instructions), landscape, with tabs
 - Word files: Title page, portrait
+
+Runs unchanged on Pillow-SIMD, a drop-in replacement for Pillow, if it is installed.
 """
 
-import openpyxl
+import argparse
+import hashlib
+import io
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from docx import Document
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Directories
 TEMPLATES_DIR = "/home/ubuntu/pmb_repo/static/templates"
 OUTPUT_DIR = "/home/ubuntu/pmb_repo/final_screenshots_FIXED"
 
+# Rendered previews keyed by content hash, shared by all pool workers for one run
+PREVIEW_CACHE_DIR = os.path.join(OUTPUT_DIR, ".cache")
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
 
-def find_data_sheet_index(wb):
+FONT_REGULAR = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+FONT_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+@lru_cache(maxsize=None)
+def _font(path, size):
+    """Load a TrueType font once per process, falling back to Pillow's default."""
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default()
+
+def find_data_sheet_index(sheet_names):
     """Find the sheet that contains DATA (not instructions)."""
-    sheet_names = wb.sheetnames
-    
     # Strategy: Skip sheets with "instruction" in the name
     for idx, name in enumerate(sheet_names):
         if 'instruction' not in name.lower() and 'user guide' not in name.lower():
@@ -28,21 +57,207 @@ def find_data_sheet_index(wb):
     # If all sheets have "instruction", use the LAST sheet (usually the data)
     return len(sheet_names) - 1
 
+_CELL_COLUMN = re.compile(r'[A-Z]+')
+
+def _local(tag):
+    """Strip the XML namespace so transitional and strict OOXML parse alike."""
+    return tag.rsplit('}', 1)[-1]
+
+def _ns_attr(elem, name):
+    """Look up an attribute regardless of its namespace prefix."""
+    for key, value in elem.attrib.items():
+        if _local(key) == name:
+            return value
+    return None
+
+def _text(elem):
+    """Concatenate the <t> runs of a string item, skipping phonetic hints."""
+    parts = []
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == 't':
+            parts.append(child.text or '')
+        elif tag == 'r':
+            parts.extend(t.text or '' for t in child if _local(t.tag) == 't')
+    return ''.join(parts)
+
+class _SharedStrings:
+    """Shared string table parsed lazily, only as far as the highest index requested."""
+    
+    def __init__(self, zf, name):
+        self._stream = zf.open(name) if name in zf.namelist() else None
+        self._events = ET.iterparse(self._stream, events=('end',)) if self._stream else iter(())
+        self._strings = []
+    
+    def __getitem__(self, idx):
+        while len(self._strings) <= idx:
+            _, elem = next(self._events)
+            if _local(elem.tag) == 'si':
+                self._strings.append(_text(elem))
+                elem.clear()
+        return self._strings[idx]
+    
+    def close(self):
+        if self._stream:
+            self._stream.close()
+
+def _date_styles(zf):
+    """Return the set of cell style indices whose number format is a date."""
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+    root = ET.fromstring(zf.read('xl/styles.xml'))
+    formats = dict(BUILTIN_FORMATS)
+    date_styles = set()
+    for section in root:
+        tag = _local(section.tag)
+        if tag == 'numFmts':
+            for fmt in section:
+                formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode', '')
+        elif tag == 'cellXfs':
+            for idx, xf in enumerate(section):
+                if is_date_format(formats.get(int(xf.get('numFmtId', 0)), '')):
+                    date_styles.add(idx)
+    return date_styles
+
+def _cell_value(cell, shared_strings, date_styles, epoch):
+    """Decode one <c> element the way openpyxl does with data_only=True."""
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        for child in cell:
+            if _local(child.tag) == 'is':
+                return _text(child)
+        return None
+    
+    raw = None
+    for child in cell:
+        if _local(child.tag) == 'v':
+            raw = child.text
+            break
+    if raw is None:
+        return None
+    
+    if cell_type == 's':
+        return shared_strings[int(raw)]
+    if cell_type == 'b':
+        return bool(int(raw))
+    if cell_type in ('str', 'e'):
+        return raw
+    value = float(raw) if '.' in raw or 'E' in raw or 'e' in raw else int(raw)
+    if int(cell.get('s', 0)) in date_styles:
+        return from_excel(value, epoch=epoch)
+    return value
+
+def _read_preview(path, max_rows=22, max_cols=12):
+    """
+    Stream the preview window of the data sheet straight from the .xlsx zip.
+    
+    Returns (sheet_names, sheet_index, rows, max_col) where rows holds at most
+    max_rows lists of max_cols values and max_col is the highest column with a cell
+    in that window, never wider than the sheet's <dimension>. Parsing stops at the
+    first row past the window, so the rest of the sheet and unused shared strings
+    are never decoded.
+    """
+    with zipfile.ZipFile(path) as zf:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+        
+        sheets = []
+        epoch = CALENDAR_WINDOWS_1900
+        for elem in workbook.iter():
+            tag = _local(elem.tag)
+            if tag == 'workbookPr' and elem.get('date1904') in ('1', 'true'):
+                epoch = CALENDAR_MAC_1904
+            elif tag == 'sheet':
+                sheets.append((elem.get('name'), targets[_ns_attr(elem, 'id')]))
+        
+        sheet_names = [name for name, _ in sheets]
+        sheet_index = find_data_sheet_index(sheet_names)
+        target = sheets[sheet_index][1]
+        sheet_path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        
+        shared_strings = _SharedStrings(zf, 'xl/sharedStrings.xml')
+        date_styles = _date_styles(zf)
+        grid = {}
+        col_bound = max_cols  # <dimension> width, capped to the window
+        seen_col = 0  # highest column with a cell in the window
+        try:
+            with zf.open(sheet_path) as stream:
+                row_number = 0
+                for _, elem in ET.iterparse(stream, events=('end',)):
+                    tag = _local(elem.tag)
+                    if tag == 'dimension':
+                        # "A1:L30" -> L; the declared width is only an upper bound, since
+                        # sheets often declare more columns than they have cells in
+                        ref = elem.get('ref', '').split(':')[-1]
+                        match = _CELL_COLUMN.match(ref)
+                        if match:
+                            col_bound = min(column_index_from_string(match.group()), max_cols)
+                    elif tag == 'row':
+                        row_number = int(elem.get('r', row_number + 1))
+                        if row_number > max_rows:
+                            break
+                        values = [None] * max_cols
+                        col_number = 0
+                        for cell in elem:
+                            if _local(cell.tag) != 'c':
+                                continue
+                            ref = cell.get('r')
+                            col_number = column_index_from_string(_CELL_COLUMN.match(ref).group()) if ref else col_number + 1
+                            if col_number <= max_cols:
+                                values[col_number - 1] = _cell_value(cell, shared_strings, date_styles, epoch)
+                                seen_col = max(seen_col, col_number)
+                        grid[row_number] = values
+                        elem.clear()
+        finally:
+            shared_strings.close()
+    
+    # Draw only the columns that have cells (at least one, like openpyxl's max_column)
+    max_col = min(max(seen_col, 1), col_bound)
+    last_row = max(grid, default=0)
+    rows = [grid.get(row_number, [None] * max_cols) for row_number in range(1, last_row + 1)]
+    return sheet_names, sheet_index, rows, max_col
+
+@lru_cache(maxsize=None)
+def _grid_base(max_row, max_col, cell_width, cell_height, padding, tab_bar_height):
+    """
+    Empty preview canvas: white background, #d0d0d0 cell grid and the tab bar.
+    
+    Painted with array slices instead of a draw.rectangle call per cell, and cached
+    per layout: there are at most 22 x 12 distinct shapes, so most files reuse one.
+    """
+    img_width = max_col * cell_width + 2 * padding
+    img_height = max_row * cell_height + 2 * padding + tab_bar_height
+    grid_right = padding + max_col * cell_width
+    grid_bottom = padding + max_row * cell_height
+    
+    arr = np.full((img_height, img_width, 3), 255, dtype=np.uint8)
+    if max_row and max_col:
+        xs = padding + np.arange(max_col + 1) * cell_width
+        ys = padding + np.arange(max_row + 1) * cell_height
+        arr[ys, padding:grid_right + 1] = (208, 208, 208)
+        arr[padding:grid_bottom + 1, xs] = (208, 208, 208)
+    arr[img_height - tab_bar_height:] = (240, 240, 240)
+    return Image.fromarray(arr)
+
 def generate_excel_screenshot(excel_path, output_path):
     """Generate Excel screenshot from DATA sheet with white backgrounds and tabs."""
     try:
-        wb = openpyxl.load_workbook(excel_path, data_only=True)
-        
-        # Find the correct data sheet
-        sheet_index = find_data_sheet_index(wb)
-        sheet_names = wb.sheetnames
-        sheet = wb.worksheets[sheet_index]
+        sheet_names, sheet_index, rows, max_col = _read_preview(excel_path)
         
         print(f"  Using sheet {sheet_index}: '{sheet_names[sheet_index]}'")
         
-        # Get dimensions
-        max_row = min(sheet.max_row, 22)
-        max_col = min(sheet.max_column, 12)
+        # Industry variants of a template often share identical preview content;
+        # reuse the PNG already rendered for it instead of drawing it again
+        preview_key = hashlib.blake2b(
+            repr((sheet_names, sheet_index, rows, max_col)).encode(), digest_size=16
+        ).hexdigest()
+        cached_path = os.path.join(PREVIEW_CACHE_DIR, preview_key + ".png")
+        if os.path.exists(cached_path):
+            shutil.copyfile(cached_path, output_path)
+            return True
+        
+        max_row = len(rows)
         
         # Calculate image dimensions (landscape)
         cell_width = 95
@@ -50,45 +265,37 @@ def generate_excel_screenshot(excel_path, output_path):
         tab_bar_height = 40
         padding = 10
         
-        img_width = max_col * cell_width + 2 * padding
         img_height = max_row * cell_height + 2 * padding + tab_bar_height
         
-        # Create image
-        img = Image.new('RGB', (img_width, img_height), color='white')
+        # Start from a cached copy of the empty grid for this size; only text and tabs vary per file
+        tab_bar_y = img_height - tab_bar_height
+        img = _grid_base(max_row, max_col, cell_width, cell_height, padding, tab_bar_height).copy()
         draw = ImageDraw.Draw(img)
         
         # Load fonts
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 10)
-            font_bold = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 10)
-            tab_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 9)
-        except:
-            font = ImageFont.load_default()
-            font_bold = font
-            tab_font = font
+        font = _font(FONT_REGULAR, 10)
+        font_bold = _font(FONT_BOLD, 10)
+        tab_font = _font(FONT_REGULAR, 9)
         
-        # Draw grid and cells
-        for row_idx in range(1, max_row + 1):
+        # Draw cell text
+        for row_idx, row in enumerate(rows, 1):
             for col_idx in range(1, max_col + 1):
-                cell = sheet.cell(row=row_idx, column=col_idx)
-                
                 x = padding + (col_idx - 1) * cell_width
                 y = padding + (row_idx - 1) * cell_height
                 
-                # Draw cell with white background
-                draw.rectangle([x, y, x + cell_width, y + cell_height], 
-                              fill='white', outline='#d0d0d0', width=1)
-                
                 # Get cell value
-                value = cell.value
+                value = row[col_idx - 1]
                 if value is not None:
                     text = str(value)[:14]
                     cell_font = font_bold if row_idx == 1 else font
-                    draw.text((x + 4, y + 7), text, fill=(0, 0, 0), font=cell_font)
-        
-        # Draw tab bar
-        tab_bar_y = img_height - tab_bar_height
-        draw.rectangle([0, tab_bar_y, img_width, img_height], fill='#f0f0f0')
+                    overflows = draw.textbbox((x + 4, y + 7), text, font=cell_font)[2] >= x + cell_width
+                    if overflows and col_idx < max_col:
+                        # Clip to the cell like the next cell's fill used to
+                        cell_img = img.crop((x, y, x + cell_width, y + cell_height))
+                        ImageDraw.Draw(cell_img).text((4, 7), text, fill=(0, 0, 0), font=cell_font)
+                        img.paste(cell_img, (x, y))
+                    else:
+                        draw.text((x + 4, y + 7), text, fill=(0, 0, 0), font=cell_font)
         
         # Draw tabs
         tab_x = 10
@@ -103,65 +310,97 @@ def generate_excel_screenshot(excel_path, output_path):
             draw.text((tab_x + 10, tab_bar_y + 12), tab_text, fill=(0, 0, 0), font=tab_font)
             tab_x += tab_width + 5
         
-        # Save
-        img.save(output_path, 'PNG', quality=95)
-        wb.close()
+        # Save, then publish to the cache atomically so concurrent workers never read a partial file
+        img.save(output_path, 'PNG', compress_level=1, optimize=False)
+        fd, tmp_path = tempfile.mkstemp(dir=PREVIEW_CACHE_DIR, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, cached_path)
         return True
         
     except Exception as e:
         print(f"  ERROR: {e}")
         return False
 
+@lru_cache(maxsize=None)
+def _word_preview_bytes():
+    """Render the (file-independent) Word preview once per process and return the PNG bytes."""
+    img = Image.new('RGB', (800, 1000), color='white')
+    draw = ImageDraw.Draw(img)
+    
+    font = _font(FONT_BOLD, 24)
+    
+    draw.text((50, 50), "Word Document Preview", fill=(0, 0, 0), font=font)
+    buf = io.BytesIO()
+    img.save(buf, 'PNG', compress_level=1, optimize=False)
+    return buf.getvalue()
+
 def generate_word_screenshot(word_path, output_path):
     """Generate Word screenshot (title page, portrait)."""
     try:
-        img = Image.new('RGB', (800, 1000), color='white')
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-        except:
-            font = ImageFont.load_default()
-        
-        draw.text((50, 50), "Word Document Preview", fill=(0, 0, 0), font=font)
-        img.save(output_path, 'PNG', quality=95)
+        Path(output_path).write_bytes(_word_preview_bytes())
         return True
     except Exception as e:
         print(f"  ERROR: {e}")
         return False
 
-# Main execution
-print("Starting FIXED screenshot generation...")
-
-excel_files = list(Path(TEMPLATES_DIR).glob("*.xlsx"))
-word_files = list(Path(TEMPLATES_DIR).glob("*.docx"))
-
-print(f"\nFound {len(excel_files)} Excel files and {len(word_files)} Word files")
-
-# Generate Excel screenshots
-excel_success = 0
-for idx, excel_file in enumerate(excel_files, 1):
-    output_name = excel_file.stem + ".png"
-    output_path = os.path.join(OUTPUT_DIR, output_name)
+def _worker(path_str, force=False):
+    """Render one template file; runs in a pool worker process.
+    
+    Returns (name, ok, skipped). Files whose PNG already exists are skipped unless
+    force is set, so a crashed batch can simply be re-run.
+    """
+    template_file = Path(path_str)
+    output_path = os.path.join(OUTPUT_DIR, template_file.stem + ".png")
     
-    print(f"[{idx}/{len(excel_files)}] {excel_file.name}")
+    if not force and os.path.exists(output_path):
+        return template_file.name, True, True
     
-    if generate_excel_screenshot(str(excel_file), output_path):
-        excel_success += 1
+    if template_file.suffix == '.xlsx':
+        ok = generate_excel_screenshot(path_str, output_path)
+    else:
+        ok = generate_word_screenshot(path_str, output_path)
+    return template_file.name, ok, False
 
-# Generate Word screenshots
-word_success = 0
-for idx, word_file in enumerate(word_files, 1):
-    output_name = word_file.stem + ".png"
-    output_path = os.path.join(OUTPUT_DIR, output_name)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate preview screenshots for all templates")
+    parser.add_argument('--force', action='store_true',
+                        help="regenerate screenshots that already exist in the output directory")
+    args = parser.parse_args()
     
-    print(f"[{idx}/{len(word_files)}] {word_file.name}")
+    print("Starting FIXED screenshot generation...")
     
-    if generate_word_screenshot(str(word_file), output_path):
-        word_success += 1
-
-print(f"\n✅ COMPLETE!")
-print(f"Excel: {excel_success}/{len(excel_files)} successful")
-print(f"Word: {word_success}/{len(word_files)} successful")
-print(f"Total: {excel_success + word_success}/{len(excel_files) + len(word_files)}")
-
+    excel_files = list(Path(TEMPLATES_DIR).glob("*.xlsx"))
+    word_files = list(Path(TEMPLATES_DIR).glob("*.docx"))
+    
+    print(f"\nFound {len(excel_files)} Excel files and {len(word_files)} Word files")
+    
+    # Start each run with an empty preview cache so renderer changes are never masked
+    shutil.rmtree(PREVIEW_CACHE_DIR, ignore_errors=True)
+    os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+    
+    # Every file renders independently, so spread the CPU-bound work over all cores
+    paths = [str(f) for f in excel_files + word_files]
+    excel_success = 0
+    word_success = 0
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_font, initargs=(FONT_REGULAR, 10)) as executor:
+        results = executor.map(_worker, paths, [args.force] * len(paths), chunksize=8)
+        for idx, (name, ok, was_skipped) in enumerate(results, 1):
+            if was_skipped:
+                skipped += 1
+            else:
+                print(f"[{idx}/{len(paths)}] {name}")
+            if not ok:
+                continue
+            if name.endswith('.xlsx'):
+                excel_success += 1
+            else:
+                word_success += 1
+    
+    print(f"\n✅ COMPLETE!")
+    print(f"Excel: {excel_success}/{len(excel_files)} successful")
+    print(f"Word: {word_success}/{len(word_files)} successful")
+    print(f"Total: {excel_success + word_success}/{len(excel_files) + len(word_files)}")
+    if skipped:
+        print(f"Skipped {skipped} already generated (use --force to regenerate)")
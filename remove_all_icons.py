@@ -1,7 +1,15 @@
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# <i class="fas/fab/far ..."></i> tags, plus trailing whitespace
+_I_TAG = re.compile(r'<i\s+class="fa[brs]\s+[^"]*"[^>]*></i>\s*')
+
+# Emoji characters to strip (each code point, including variation selectors)
+EMOJI_CHARS = '🎯🚀💡📊✨🔒⚡💼📈🎨🔧⭐🌟💪🏆📱💻🎁🔥👥📝✅❌⚠️📢🎉🤝💰📉🗂️📅🔔🎓🌐🔍📎🖼️'
+_EMOJI_TRANS = str.maketrans('', '', EMOJI_CHARS)
+
 def remove_icons_from_file(filepath):
     """Remove all FontAwesome icons and emojis from an HTML file"""
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -9,12 +17,8 @@ def remove_icons_from_file(filepath):
     
     original_content = content
     
-    # Pattern 1: Remove <i class="fas/fab/far ..."></i> tags completely
-    content = re.sub(r'<i\s+class="fa[brs]\s+[^"]*"[^>]*></i>\s*', '', content)
-    
-    # Pattern 2: Remove emoji characters
-    emoji_pattern = r'[🎯🚀💡📊✨🔒⚡💼📈🎨🔧⭐🌟💪🏆📱💻🎁🔥👥📝✅❌⚠️📢🎉🤝💰📉🗂️📅🔔🎓🌐🔍📎🖼️]'
-    content = re.sub(emoji_pattern, '', content)
+    # Remove <i class="fas/fab/far ..."></i> tags completely, then emoji characters
+    content = _I_TAG.sub('', content).translate(_EMOJI_TRANS)
     
     # Only write if changes were made
     if content != original_content:
@@ -23,13 +27,29 @@ def remove_icons_from_file(filepath):
         return True
     return False
 
+def _iter_html(root):
+    """Yield paths of .html files under root, using scandir's cached d_type instead of a stat per entry"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.html'):
+                    yield entry.path
+
 def main():
     templates_dir = Path('/home/ubuntu/pmb_repo/templates')
     modified_files = []
     
-    # Process all HTML files
-    for html_file in templates_dir.rglob('*.html'):
-        if remove_icons_from_file(html_file):
+    # Process all HTML files; the work is file I/O, so overlap it across threads
+    files = list(_iter_html(templates_dir))
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        results = list(executor.map(remove_icons_from_file, files))
+    
+    for html_file, modified in zip(files, results):
+        if modified:
             modified_files.append(str(html_file))
             print(f"Modified: {html_file}")
     
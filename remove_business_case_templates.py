@@ -5,6 +5,7 @@ Remove all Business Case templates from database and files
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +13,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import app, db
 from models import Template
 
+def _delete_file(path):
+    """Delete a template file, returning False if it was already gone"""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
 def main():
     print("=" * 80)
     print("REMOVING ALL BUSINESS CASE TEMPLATES")
@@ -21,32 +30,34 @@ def main():
     templates_dir = Path(__file__).parent / 'static' / 'templates'
     
     with app.app_context():
-        # Find all Business Case templates
-        business_cases = Template.query.filter(Template.name == 'Business Case').all()
+        # Find all Business Case templates (only the columns needed for the report and files)
+        is_business_case = Template.name == 'Business Case'
+        business_cases = db.session.query(
+            Template.id, Template.name, Template.industry, Template.file_path
+        ).filter(is_business_case).all()
         
         print(f"Found {len(business_cases)} Business Case templates to remove")
         print()
         
-        for template in business_cases:
-            print(f"Removing ID {template.id}: {template.name}")
-            print(f"  Industry: {template.industry}")
-            print(f"  File: {template.file_path}")
-            
-            # Delete file
-            file_path = templates_dir / template.file_path
-            if file_path.exists():
-                file_path.unlink()
+        # Delete files concurrently; unlinks are independent I/O-bound syscalls
+        paths = [templates_dir / file_path for _, _, _, file_path in business_cases]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            deleted = list(executor.map(_delete_file, paths))
+        
+        for (template_id, name, industry, file_path), was_deleted in zip(business_cases, deleted):
+            print(f"Removing ID {template_id}: {name}")
+            print(f"  Industry: {industry}")
+            print(f"  File: {file_path}")
+            if was_deleted:
                 print(f"  ✅ File deleted")
             else:
                 print(f"  ⚠️  File not found")
-            
-            # Delete from database
-            db.session.delete(template)
-            print(f"  ✅ Removed from database")
             print()
         
-        # Commit changes
+        # Delete from database with a single DELETE statement
+        Template.query.filter(is_business_case).delete(synchronize_session=False)
         db.session.commit()
+        print(f"✅ Removed {len(business_cases)} templates from database")
         print("=" * 80)
         print(f"COMPLETE - Removed {len(business_cases)} Business Case templates")
         print("=" * 80)
@@ -8,6 +8,7 @@ Example: AI_ML_Project_Plan.xlsx
 import os
 import sys
 import re
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -15,23 +16,44 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app, db, Template
 
+# Commit renames in groups so one transaction covers many rows but progress survives a crash
+COMMIT_EVERY = 200
+
+_NON_WORD = re.compile(r'[^\w\s-]')
+_SEP = re.compile(r'[\s-]+')
+
+@lru_cache(maxsize=None)
 def sanitize_industry_name(industry):
-    """Convert industry name to filename-safe format"""
+    """Convert industry name to filename-safe format (cached; industries repeat across rows)"""
     # Remove special characters and replace spaces with underscores
-    sanitized = re.sub(r'[^\w\s-]', '', industry)
-    sanitized = re.sub(r'[\s-]+', '_', sanitized)
-    return sanitized
+    return _SEP.sub('_', _NON_WORD.sub('', industry))
 
 def rename_template_file(old_path, new_path):
-    """Rename a template file"""
-    if os.path.exists(old_path):
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(new_path), exist_ok=True)
-        
-        # Rename the file
+    """Rename a template file; the destination directory must already exist"""
+    try:
         os.rename(old_path, new_path)
-        return True
-    return False
+    except FileNotFoundError:
+        return False
+    return True
+
+def commit_batch(renames):
+    """Commit pending row changes; on failure roll back and undo the batch's file renames
+
+    renames holds the (old_path, new_path) pairs renamed since the last commit.
+    Returns the number of renames kept.
+    """
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"✗ Commit failed, restoring {len(renames)} renamed files: {e}")
+        for old_path, new_path in reversed(renames):
+            rename_template_file(new_path, old_path)
+        kept = 0
+    else:
+        kept = len(renames)
+    renames.clear()
+    return kept
 
 def main():
     """Main function to rename all templates"""
@@ -41,9 +63,15 @@ def main():
         
         templates = Template.query.all()
         
+        # All files live in one directory, so create it once up front
+        templates_dir = os.path.join('public', 'templates')
+        os.makedirs(templates_dir, exist_ok=True)
+        
         renamed_count = 0
         skipped_count = 0
         error_count = 0
+        # Files renamed since the last commit, undone if that commit fails
+        batch_renames = []
         
         for template in templates:
             try:
@@ -65,11 +93,13 @@ def main():
                 new_filename = f"{industry_prefix}_{template_name_without_ext}{file_extension}"
                 
                 # Get file paths
-                old_file_path = os.path.join('public', 'templates', current_filename)
-                new_file_path = os.path.join('public', 'templates', new_filename)
+                old_file_path = os.path.join(templates_dir, current_filename)
+                new_file_path = os.path.join(templates_dir, new_filename)
                 
                 # Rename physical file
                 if rename_template_file(old_file_path, new_file_path):
+                    batch_renames.append((old_file_path, new_file_path))
+                    
                     # Update database record
                     template.filename = new_filename
                     
@@ -77,10 +107,12 @@ def main():
                     if not template.name.startswith(template.industry):
                         template.name = f"{template.industry} {template.name}"
                     
-                    db.session.commit()
-                    
                     print(f"✓ Renamed: {current_filename} → {new_filename}")
-                    renamed_count += 1
+                    
+                    if len(batch_renames) >= COMMIT_EVERY:
+                        kept = commit_batch(batch_renames)
+                        renamed_count += kept
+                        error_count += COMMIT_EVERY - kept
                 else:
                     print(f"✗ File not found: {old_file_path}")
                     error_count += 1
@@ -88,7 +120,11 @@ def main():
             except Exception as e:
                 print(f"✗ Error renaming {template.filename}: {e}")
                 error_count += 1
-                db.session.rollback()
+        
+        pending = len(batch_renames)
+        kept = commit_batch(batch_renames)
+        renamed_count += kept
+        error_count += pending - kept
         
         print("\n" + "="*60)
         print("RENAMING SUMMARY")
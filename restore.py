@@ -0,0 +1,226 @@
+"""
+Restore template metadata from a catalog JSON file
+Shared by restore_database_from_backup.py; also runnable directly:
+
+    python restore.py --strategy update --catalog templates_catalog_final.json
+
+Strategies:
+- update: update existing templates matched by filename, never add new ones
+- upsert: update matches and insert catalog entries missing from the database
+- delete: clear the templates table and load the catalog from scratch
+"""
+import argparse
+from collections import defaultdict
+from sqlalchemy import func
+
+try:
+    import ijson
+
+    def iter_catalog(path):
+        """Stream catalog entries one at a time"""
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item')
+except ImportError:
+    try:
+        import orjson
+
+        def load_catalog(path):
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+    except ImportError:
+        import json
+
+        def load_catalog(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+
+    def iter_catalog(path):
+        """Iterate catalog entries (whole file parsed up front without ijson)"""
+        yield from load_catalog(path)
+
+from app import app, db
+from models import Template
+
+UPDATE_BATCH_SIZE = 500
+STRATEGIES = ('update', 'upsert', 'delete')
+DEFAULT_CATALOG_PATH = 'templates_catalog_final.json'
+DEFAULT_EXCLUDED_CATEGORIES = ('Business Case',)
+
+def _catalog_values(catalog_entry):
+    """Template column values carried over from a catalog entry"""
+    return {
+        'name': catalog_entry['name'],
+        'description': catalog_entry['description'],
+        'category': catalog_entry['category'],
+        'industry': catalog_entry['industry'],
+        'file_format': catalog_entry.get('file_format', catalog_entry.get('file_type', 'xlsx')).upper(),
+    }
+
+def _flush_updates(batch):
+    if batch:
+        db.session.bulk_update_mappings(Template, batch)
+        batch.clear()
+
+def _flush_inserts(batch):
+    if batch:
+        db.session.execute(Template.__table__.insert(), batch)
+        batch.clear()
+
+def restore_database(catalog_path=DEFAULT_CATALOG_PATH, exclude_categories=DEFAULT_EXCLUDED_CATEGORIES, strategy='update'):
+    """Restore database from correct catalog"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}")
+    exclude_categories = set(exclude_categories)
+    
+    with app.app_context():
+        print(f"🔄 Starting database restoration ({strategy})...")
+        
+        if strategy == 'delete':
+            print("🗑️  Clearing existing templates from database...")
+            Template.query.delete()
+        
+        # Map each existing file_path to its template ids (only the columns needed to match)
+        existing_templates = db.session.query(Template.id, Template.file_path).all()
+        ids_by_path = defaultdict(list)
+        for template_id, file_path in existing_templates:
+            ids_by_path[file_path].append(template_id)
+        print(f"📊 Found {len(existing_templates)} existing templates in database")
+        
+        # Stream the correct catalog, matching entries by filename as they arrive
+        print(f"📁 Streaming catalog from {catalog_path}...")
+        print("🔄 Updating templates...")
+        
+        loaded_count = 0
+        kept_count = 0
+        inserted_count = 0
+        catalog_filenames = set()
+        matched_paths = set()
+        updated_ids = set()
+        updates = []
+        inserts = []
+        errors = []
+        
+        try:
+            for catalog_entry in iter_catalog(catalog_path):
+                loaded_count += 1
+                
+                # Filter out excluded categories (Business Case templates by default)
+                if catalog_entry['category'] in exclude_categories:
+                    continue
+                kept_count += 1
+                catalog_filenames.add(catalog_entry['filename'])
+                
+                template_ids = ids_by_path.get(catalog_entry['filename'])
+                if template_ids:
+                    matched_paths.add(catalog_entry['filename'])
+                    values = _catalog_values(catalog_entry)
+                    for template_id in template_ids:
+                        updated_ids.add(template_id)
+                        updates.append(dict(values, id=template_id))
+                elif strategy != 'update':
+                    inserts.append(dict(_catalog_values(catalog_entry), file_path=catalog_entry['filename']))
+                    inserted_count += 1
+                
+                if len(updates) >= UPDATE_BATCH_SIZE:
+                    _flush_updates(updates)
+                if len(inserts) >= UPDATE_BATCH_SIZE:
+                    _flush_inserts(inserts)
+            
+            _flush_updates(updates)
+            _flush_inserts(inserts)
+            
+            # Commit all changes at once
+            print("💾 Committing changes to database...")
+            db.session.commit()
+            updated_count = len(updated_ids)
+        except Exception as e:
+            db.session.rollback()
+            updated_count = 0
+            inserted_count = 0
+            errors.append(f"Error updating templates: {e}")
+        
+        print(f"✅ Loaded {loaded_count} templates from catalog")
+        print(f"✅ Filtered to {kept_count} templates (excluded {loaded_count - kept_count} {', '.join(sorted(exclude_categories))} templates)")
+        print(f"📊 Catalog has {len(catalog_filenames)} unique templates by filename")
+        
+        # Templates that exist in database but not in catalog are left alone
+        skipped_count = 0
+        for template_id, file_path in existing_templates:
+            if file_path not in matched_paths:
+                skipped_count += 1
+                if skipped_count <= 10:  # Show first 10 skipped
+                    print(f"  ⚠️  Skipped template not in catalog: {file_path}")
+        
+        print(f"\n✅ Database restoration complete!")
+        print(f"📊 Updated {updated_count} existing templates")
+        if strategy != 'update':
+            print(f"📊 Inserted {inserted_count} new templates")
+        print(f"📊 Skipped {skipped_count} templates not in catalog")
+        
+        if errors:
+            print(f"\n⚠️  {len(errors)} errors occurred:")
+            for error in errors[:10]:  # Show first 10 errors
+                print(f"  - {error}")
+        
+        # Verify restoration
+        print("\n🔍 Verifying restoration...")
+        total = Template.query.count()
+        industries = db.session.query(Template.industry).distinct().count()
+        
+        print(f"✅ Total templates in database: {total}")
+        print(f"✅ Total industries: {industries}")
+        
+        # Show sample by industry
+        print("\n📋 Sample templates by industry:")
+        sample_industries = ['Healthcare', 'Construction', 'Finance', 'IT', 'Product']
+        counts = dict(
+            db.session.query(Template.industry, func.count(Template.id))
+            .filter(Template.industry.in_(sample_industries))
+            .group_by(Template.industry)
+            .all()
+        )
+        # First template per industry in one query (window function works on SQLite and PostgreSQL)
+        ranked = (
+            db.session.query(
+                Template.id,
+                func.row_number().over(partition_by=Template.industry, order_by=Template.id).label('rank')
+            )
+            .filter(Template.industry.in_(sample_industries))
+            .subquery()
+        )
+        samples = (
+            db.session.query(Template)
+            .join(ranked, Template.id == ranked.c.id)
+            .filter(ranked.c.rank == 1)
+            .all()
+        )
+        samples_by_industry = {sample.industry: sample for sample in samples}
+        for industry in sample_industries:
+            count = counts.get(industry, 0)
+            sample = samples_by_industry.get(industry)
+            if sample:
+                print(f"  {industry}: {count} templates")
+                print(f"    Example: {sample.name[:50]}...")
+                print(f"    Description: {sample.description[:60]}...")
+                
+        # Verify no AI ML descriptions
+        ai_ml_count = Template.query.filter(Template.description.like('%AI ML%')).count()
+        if ai_ml_count > 0:
+            print(f"\n⚠️  WARNING: Found {ai_ml_count} templates with 'AI ML' in description!")
+        else:
+            print(f"\n✅ SUCCESS: No AI ML descriptions found - all templates have correct industry content!")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Restore template metadata from a catalog JSON file')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='update',
+                        help='update existing rows only (default), upsert, or delete and reload')
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG_PATH,
+                        help='catalog JSON path (default: %(default)s)')
+    parser.add_argument('--exclude-category', action='append', dest='exclude_categories',
+                        help='catalog category to skip; repeatable (default: Business Case)')
+    args = parser.parse_args()
+    restore_database(
+        catalog_path=args.catalog,
+        exclude_categories=args.exclude_categories or DEFAULT_EXCLUDED_CATEGORIES,
+        strategy=args.strategy,
+    )
@@ -2,109 +2,10 @@
 Restore database from templates_catalog_final.json
 This will replace all corrupted AI ML templates with correct industry-specific templates
 Updates existing templates ONLY - does not add new templates
-"""
-import json
-import os
-from app import app, db
-from models import Template
 
-def restore_database():
-    """Restore database from correct catalog"""
-    
-    with app.app_context():
-        print("🔄 Starting database restoration...")
-        
-        # Load correct catalog
-        catalog_path = 'templates_catalog_final.json'
-        print(f"📁 Loading catalog from {catalog_path}...")
-        
-        with open(catalog_path, 'r') as f:
-            all_templates = json.load(f)
-        
-        print(f"✅ Loaded {len(all_templates)} templates from catalog")
-        
-        # Filter out Business Case templates (30 templates to remove)
-        templates = [t for t in all_templates if t['category'] != 'Business Case']
-        print(f"✅ Filtered to {len(templates)} templates (excluded {len(all_templates) - len(templates)} Business Case templates)")
-        
-        # Create a mapping of filename to catalog entry
-        catalog_by_filename = {entry['filename']: entry for entry in templates}
-        print(f"📊 Catalog has {len(catalog_by_filename)} unique templates by filename")
-        
-        # Get all existing templates
-        existing_templates = Template.query.all()
-        print(f"📊 Found {len(existing_templates)} existing templates in database")
-        
-        # Update existing templates
-        print("🔄 Updating templates...")
-        updated_count = 0
-        skipped_count = 0
-        errors = []
-        
-        for template in existing_templates:
-            try:
-                # Find matching catalog entry by filename
-                catalog_entry = catalog_by_filename.get(template.file_path)
-                
-                if catalog_entry:
-                    # Update template with correct data
-                    template.name = catalog_entry['name']
-                    template.description = catalog_entry['description']
-                    template.category = catalog_entry['category']
-                    template.industry = catalog_entry['industry']
-                    template.file_format = catalog_entry.get('file_format', catalog_entry.get('file_type', 'xlsx')).upper()
-                    updated_count += 1
-                else:
-                    # Template exists in database but not in catalog - skip it
-                    skipped_count += 1
-                    if skipped_count <= 10:  # Show first 10 skipped
-                        print(f"  ⚠️  Skipped template not in catalog: {template.file_path}")
-                    
-                if updated_count % 100 == 0 and updated_count > 0:
-                    print(f"  Progress: {updated_count} templates updated...")
-                    
-            except Exception as e:
-                errors.append(f"Error updating template {template.id} ({template.file_path}): {e}")
-        
-        # Commit all changes
-        print("💾 Committing changes to database...")
-        db.session.commit()
-        
-        print(f"\n✅ Database restoration complete!")
-        print(f"📊 Updated {updated_count} existing templates")
-        print(f"📊 Skipped {skipped_count} templates not in catalog")
-        
-        if errors:
-            print(f"\n⚠️  {len(errors)} errors occurred:")
-            for error in errors[:10]:  # Show first 10 errors
-                print(f"  - {error}")
-        
-        # Verify restoration
-        print("\n🔍 Verifying restoration...")
-        total = Template.query.count()
-        industries = db.session.query(Template.industry).distinct().count()
-        
-        print(f"✅ Total templates in database: {total}")
-        print(f"✅ Total industries: {industries}")
-        
-        # Show sample by industry
-        print("\n📋 Sample templates by industry:")
-        sample_industries = ['Healthcare', 'Construction', 'Finance', 'IT', 'Product']
-        for industry in sample_industries:
-            count = Template.query.filter_by(industry=industry).count()
-            sample = Template.query.filter_by(industry=industry).first()
-            if sample:
-                print(f"  {industry}: {count} templates")
-                print(f"    Example: {sample.name[:50]}...")
-                print(f"    Description: {sample.description[:60]}...")
-                
-        # Verify no AI ML descriptions
-        ai_ml_count = Template.query.filter(Template.description.like('%AI ML%')).count()
-        if ai_ml_count > 0:
-            print(f"\n⚠️  WARNING: Found {ai_ml_count} templates with 'AI ML' in description!")
-        else:
-            print(f"\n✅ SUCCESS: No AI ML descriptions found - all templates have correct industry content!")
+Thin wrapper around restore.restore_database(strategy='update').
+"""
+from restore import restore_database
 
 if __name__ == '__main__':
-    restore_database()
-
+    restore_database(catalog_path='templates_catalog_final.json', strategy='update')
@@ -4,8 +4,12 @@
 import os
 import json
 import time
-import base64
+import random
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # ImgBB API configuration
@@ -17,6 +21,85 @@ SCREENSHOTS_DIR = Path("/home/ubuntu/pmb_repo/static/final_screenshots")
 URLS_FILE = Path("/home/ubuntu/pmb_repo/imgbb_urls.json")
 LOG_FILE = Path("/home/ubuntu/pmb_repo/upload_log_resume.txt")
 
+# Concurrency and rate limiting - at most RATE_LIMIT uploads start in any RATE_WINDOW seconds
+# MAX_WORKERS caps concurrency; the AIMD controller picks how many of them upload at once
+MAX_WORKERS = 8
+INITIAL_CONCURRENCY = 4
+AIMD_INCREASE = 0.5
+AIMD_DECREASE = 0.5
+AIMD_WINDOW = 10
+TARGET_LATENCY = 5.0
+RATE_LIMIT = 8
+RATE_WINDOW = 1.0
+
+# Transient failures (rate limiting, gateway errors) are retried with exponential backoff
+MAX_RETRIES = 6
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 32
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# One keep-alive session for all uploads, with a connection per worker thread
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=0))
+
+class RateLimiter:
+    """Sliding-window limiter shared by the upload threads"""
+    
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.calls = deque()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until another call fits in the window"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.window:
+                    self.calls.popleft()
+                if len(self.calls) < self.limit:
+                    self.calls.append(now)
+                    return
+                wait = self.window - (now - self.calls[0])
+            time.sleep(wait)
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit: grow additively while uploads are healthy, halve on throttling"""
+    
+    def __init__(self, initial, maximum, increase=AIMD_INCREASE, decrease=AIMD_DECREASE,
+                 window=AIMD_WINDOW, target_latency=TARGET_LATENCY):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.samples = []
+        self.cond = threading.Condition()
+    
+    def acquire(self):
+        """Block until the number of in-flight uploads is under the current limit"""
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+    
+    def release(self, latency, throttled):
+        """Record one response and adjust the limit every `window` samples"""
+        with self.cond:
+            self.in_flight -= 1
+            self.samples.append((latency, throttled))
+            if len(self.samples) >= self.window:
+                mean_latency = sum(latency for latency, _ in self.samples) / len(self.samples)
+                if any(throttled for _, throttled in self.samples) or mean_latency > self.target_latency:
+                    self.limit = max(1.0, self.limit * self.decrease)
+                else:
+                    self.limit = min(float(self.maximum), self.limit + self.increase)
+                self.samples.clear()
+            self.cond.notify_all()
+
 def load_existing_urls():
     """Load already uploaded URLs"""
     if URLS_FILE.exists():
@@ -25,23 +108,47 @@ def load_existing_urls():
     return {}
 
 def save_urls(urls_dict):
-    """Save URLs to JSON file"""
-    with open(URLS_FILE, 'w') as f:
+    """Save URLs to JSON file atomically so a crash never leaves torn JSON behind"""
+    tmp_file = URLS_FILE.with_suffix('.json.tmp')
+    with open(tmp_file, 'w') as f:
         json.dump(urls_dict, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, URLS_FILE)
 
-def upload_image(image_path, api_key):
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying: Retry-After if the server sent one, else backoff with jitter"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return min(RETRY_MAX_DELAY, int(retry_after))
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, RETRY_BASE_DELAY))
+
+def upload_image(image_path, api_key, session=SESSION, concurrency=None):
     """Upload a single image to ImgBB"""
     try:
-        with open(image_path, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
-        
         payload = {
             'key': api_key,
-            'image': image_data,
             'name': image_path.stem
         }
         
-        response = requests.post(API_URL, data=payload, timeout=30)
+        for attempt in range(MAX_RETRIES + 1):
+            # Send the raw PNG as a multipart file part instead of a base64 string copy
+            if concurrency is not None:
+                concurrency.acquire()
+            started = time.monotonic()
+            response = None
+            try:
+                with open(image_path, 'rb') as f:
+                    response = session.post(API_URL, data=payload, files={'image': f}, timeout=30)
+            finally:
+                if concurrency is not None:
+                    # Connection errors count as throttling too
+                    throttled = response is None or response.status_code in RETRY_STATUSES
+                    concurrency.release(time.monotonic() - started, throttled)
+            
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            time.sleep(retry_delay(response, attempt))
         
         if response.status_code == 200:
             data = response.json()
@@ -56,6 +163,11 @@ def upload_image(image_path, api_key):
         print(f"Error uploading {image_path.name}: {e}")
         return None
 
+def upload_image_limited(image_path, api_key, limiter, concurrency):
+    """Upload a single image once the rate limiter allows it"""
+    limiter.acquire()
+    return upload_image(image_path, api_key, concurrency=concurrency)
+
 def main():
     """Main upload function"""
     # Load existing URLs
@@ -65,14 +177,20 @@ def main():
     print(f"Already uploaded: {uploaded_count} images")
     print(f"Starting resume upload...")
     
-    # Get all screenshot files
-    all_files = sorted(SCREENSHOTS_DIR.glob("*.png"))
-    total_files = len(all_files)
+    # Scan screenshot files once, keeping only names that still need uploading
+    total_files = 0
+    remaining_names = []
+    with os.scandir(SCREENSHOTS_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith('.png'):
+                total_files += 1
+                if entry.name not in existing_urls:
+                    remaining_names.append(entry.name)
     
     print(f"Total screenshot files: {total_files}")
     
-    # Filter out already uploaded files
-    remaining_files = [f for f in all_files if f.name not in existing_urls]
+    # Sort only the remaining slice so uploads still go in name order
+    remaining_files = [SCREENSHOTS_DIR / name for name in sorted(remaining_names)]
     print(f"Remaining to upload: {len(remaining_files)}")
     
     success_count = 0
@@ -84,35 +202,43 @@ def main():
         log.write(f"Remaining: {len(remaining_files)}\n")
         log.write("=" * 80 + "\n\n")
         
-        for idx, image_file in enumerate(remaining_files, 1):
-            print(f"Uploading {idx}/{len(remaining_files)}: {image_file.name}")
-            
-            url = upload_image(image_file, API_KEY)
+        limiter = RateLimiter(RATE_LIMIT, RATE_WINDOW)
+        concurrency = AdaptiveConcurrency(INITIAL_CONCURRENCY, MAX_WORKERS)
+        lock = threading.Lock()
+        
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(upload_image_limited, image_file, API_KEY, limiter, concurrency): image_file
+                for image_file in remaining_files
+            }
             
-            if url:
-                existing_urls[image_file.name] = url
-                success_count += 1
-                log.write(f"✓ Success: {image_file.name}\n")
-                log.write(f"  URL: {url}\n\n")
-                log.flush()
+            for idx, future in enumerate(as_completed(futures), 1):
+                image_file = futures[future]
+                url = future.result()
                 
-                # Save progress every 10 uploads
-                if success_count % 10 == 0:
-                    save_urls(existing_urls)
-                    print(f"  Progress saved: {uploaded_count + success_count} total")
-            else:
-                fail_count += 1
-                log.write(f"✗ Failed: {image_file.name}\n\n")
-                log.flush()
-            
-            # Progress update
-            if idx % 50 == 0:
-                total_uploaded = uploaded_count + success_count
-                print(f"Progress: {idx}/{len(remaining_files)} ({success_count} success, {fail_count} failed)")
-                print(f"Total uploaded so far: {total_uploaded}/{total_files}")
-            
-            # Rate limiting - wait 0.5 seconds between uploads
-            time.sleep(0.5)
+                # Results are handled on this thread, but keep shared state writes under the lock
+                with lock:
+                    print(f"Uploaded {idx}/{len(remaining_files)}: {image_file.name}")
+                    
+                    if url:
+                        existing_urls[image_file.name] = url
+                        success_count += 1
+                        log.write(f"✓ Success: {image_file.name}\n")
+                        log.write(f"  URL: {url}\n\n")
+                        log.flush()
+                        
+                        # Checkpoint after every success so a restart never re-uploads
+                        save_urls(existing_urls)
+                    else:
+                        fail_count += 1
+                        log.write(f"✗ Failed: {image_file.name}\n\n")
+                        log.flush()
+                    
+                    # Progress update
+                    if idx % 50 == 0:
+                        total_uploaded = uploaded_count + success_count
+                        print(f"Progress: {idx}/{len(remaining_files)} ({success_count} success, {fail_count} failed)")
+                        print(f"Total uploaded so far: {total_uploaded}/{total_files}")
         
         # Final save
         save_urls(existing_urls)
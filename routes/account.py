@@ -17,19 +17,33 @@ def account_page():
     """Display user account page with subscription and billing info"""
     from database import db, TemplatePurchase, Payment, TemplateDownload
     
+    # Purchases and payments are paginated separately so each tab pages on its own
+    per_page = 50
+    purchases_page = request.args.get('purchases_page', 1, type=int)
+    payments_page = request.args.get('payments_page', 1, type=int)
+    
     # Get purchased templates
     try:
-        purchased_templates = TemplatePurchase.query.filter_by(
+        purchases_pagination = TemplatePurchase.query.filter_by(
             user_id=current_user.id
-        ).order_by(TemplatePurchase.purchased_at.desc()).all()
+        ).order_by(TemplatePurchase.purchased_at.desc()).paginate(
+            page=purchases_page, per_page=per_page, error_out=False
+        )
+        purchased_templates = purchases_pagination.items
+        purchased_count = purchases_pagination.total
     except Exception as e:
         print(f"Error fetching purchases: {e}")
+        purchases_pagination = None
         purchased_templates = []
+        purchased_count = 0
     
     # Get payment history
-    payment_history = Payment.query.filter_by(
+    payments_pagination = Payment.query.filter_by(
         user_id=current_user.id
-    ).order_by(Payment.created_at.desc()).all()
+    ).order_by(Payment.created_at.desc()).paginate(
+        page=payments_page, per_page=per_page, error_out=False
+    )
+    payment_history = payments_pagination.items
     
     # Calculate this month's usage
     first_day_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -42,20 +56,26 @@ def account_page():
     # Count AI generations this month (from AI history tables)
     from app import AIGeneratorHistory, AISuggestionHistory
     
-    ai_generations_this_month = AIGeneratorHistory.query.filter(
+    # Both tables are counted in one round-trip: SELECT (subquery) + (subquery)
+    ai_generator_count = db.session.query(func.count(AIGeneratorHistory.id)).filter(
         AIGeneratorHistory.user_id == current_user.id,
         AIGeneratorHistory.created_at >= first_day_of_month
-    ).count()
+    ).scalar_subquery()
     
-    ai_generations_this_month += AISuggestionHistory.query.filter(
+    ai_suggestion_count = db.session.query(func.count(AISuggestionHistory.id)).filter(
         AISuggestionHistory.user_id == current_user.id,
         AISuggestionHistory.created_at >= first_day_of_month
-    ).count()
+    ).scalar_subquery()
+    
+    ai_generations_this_month = db.session.query(ai_generator_count + ai_suggestion_count).scalar() or 0
     
     return render_template(
         'account.html',
         purchased_templates=purchased_templates,
+        purchased_count=purchased_count,
+        purchases_pagination=purchases_pagination,
         payment_history=payment_history,
+        payments_pagination=payments_pagination,
         downloads_this_month=downloads_this_month,
         ai_generations_this_month=ai_generations_this_month
     )
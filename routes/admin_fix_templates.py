@@ -2,12 +2,29 @@
 Admin endpoint to fix missing template database records
 """
 
-from flask import Blueprint, jsonify, request
-import json
+from flask import Blueprint, request
 import os
 
+from utils.fast_json import load_file, ojsonify
+
 admin_fix_bp = Blueprint('admin_fix', __name__, url_prefix='/api/admin')
 
+# Paths are resolved once at import rather than on every request
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_PATH = os.path.join(BASE_DIR, 'templates_catalog.json')
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'static', 'templates')
+
+# Parsed catalog, reused until the file's mtime changes
+_CATALOG_CACHE = {'mtime': None, 'data': None}
+
+def _load_catalog():
+    """Return the parsed catalog, re-reading it only when the file has changed"""
+    mtime = os.stat(CATALOG_PATH).st_mtime_ns
+    if mtime != _CATALOG_CACHE['mtime']:
+        _CATALOG_CACHE['data'] = load_file(CATALOG_PATH)
+        _CATALOG_CACHE['mtime'] = mtime
+    return _CATALOG_CACHE['data']
+
 @admin_fix_bp.route('/fix-missing-templates', methods=['POST'])
 def fix_missing_templates():
     """
@@ -21,68 +38,88 @@ def fix_missing_templates():
     """
     try:
         from database import db, Template
+        from sqlalchemy.exc import IntegrityError
         
         # Load catalog
-        catalog_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            'templates_catalog.json'
-        )
-        
-        with open(catalog_path, 'r') as f:
-            catalog = json.load(f)
+        catalog = _load_catalog()
         
         fixed = []
         already_exist = []
         errors = []
         
-        for template_data in catalog:
-            template_id = template_data.get('id')
-            filename = template_data['filename']
+        # Skip entries with no ID
+        catalog_entries = [t for t in catalog if t.get('id')]
+        
+        # Check which IDs already exist with a single query
+        catalog_ids = [t['id'] for t in catalog_entries]
+        existing_ids = {
+            row.id for row in
+            db.session.query(Template.id).filter(Template.id.in_(catalog_ids)).all()
+        }
+        
+        new_templates = []
+        for template_data in catalog_entries:
+            template_id = template_data['id']
             
-            # Skip if no ID
-            if not template_id:
+            if template_id in existing_ids:
+                already_exist.append({
+                    'id': template_id,
+                    'name': template_data['name']
+                })
                 continue
             
-            # Check if exists
-            existing = Template.query.filter_by(id=template_id).first()
+            # Create new record
+            try:
+                new_template = Template(
+                    id=template_id,
+                    name=template_data['name'],
+                    filename=template_data['filename'],
+                    category=template_data['category'],
+                    industry=template_data['industry'],
+                    description=template_data.get('description', ''),
+                    file_type=template_data.get('file_type', 'xlsx'),
+                    is_premium=False,
+                    downloads=0
+                )
+                new_templates.append((template_data, new_template))
             
-            if existing:
-                already_exist.append({
+            except Exception as e:
+                errors.append({
                     'id': template_id,
-                    'name': template_data['name']
+                    'name': template_data['name'],
+                    'error': str(e)
                 })
-            else:
-                # Create new record
+        
+        # Insert all missing records in one transaction
+        try:
+            db.session.add_all([t for _, t in new_templates])
+            db.session.commit()
+            committed = new_templates
+        except IntegrityError:
+            # Fall back to per-row commits so one bad record doesn't block the rest
+            db.session.rollback()
+            committed = []
+            for template_data, new_template in new_templates:
                 try:
-                    new_template = Template(
-                        id=template_id,
-                        name=template_data['name'],
-                        filename=filename,
-                        category=template_data['category'],
-                        industry=template_data['industry'],
-                        description=template_data.get('description', ''),
-                        file_type=template_data.get('file_type', 'xlsx'),
-                        is_premium=False,
-                        downloads=0
-                    )
-                    
                     db.session.add(new_template)
                     db.session.commit()
-                    
-                    fixed.append({
-                        'id': template_id,
-                        'name': template_data['name'],
-                        'filename': filename
-                    })
-                
+                    committed.append((template_data, new_template))
                 except Exception as e:
+                    db.session.rollback()
                     errors.append({
-                        'id': template_id,
+                        'id': template_data['id'],
                         'name': template_data['name'],
                         'error': str(e)
                     })
         
-        return jsonify({
+        for template_data, _ in committed:
+            fixed.append({
+                'id': template_data['id'],
+                'name': template_data['name'],
+                'filename': template_data['filename']
+            })
+        
+        return ojsonify({
             'success': True,
             'fixed_count': len(fixed),
             'already_exist_count': len(already_exist),
@@ -92,7 +129,7 @@ def fix_missing_templates():
         }), 200
     
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -112,29 +149,32 @@ def verify_all_templates():
         from database import db, Template
         
         # Load catalog
-        catalog_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            'templates_catalog.json'
-        )
-        
-        with open(catalog_path, 'r') as f:
-            catalog = json.load(f)
+        catalog = _load_catalog()
         
         missing_in_db = []
         missing_files = []
         all_good = []
         
-        for template_data in catalog:
-            template_id = template_data.get('id')
+        catalog_entries = [t for t in catalog if t.get('id')]
+        
+        # Check database with a single query
+        catalog_ids = [t['id'] for t in catalog_entries]
+        db_ids = {
+            row.id for row in
+            db.session.query(Template.id).filter(Template.id.in_(catalog_ids)).all()
+        }
+        
+        # Check files with a single directory read
+        try:
+            existing_files = set(os.listdir(TEMPLATES_DIR))
+        except FileNotFoundError:
+            existing_files = set()
+        
+        for template_data in catalog_entries:
+            template_id = template_data['id']
             filename = template_data['filename']
             
-            if not template_id:
-                continue
-            
-            # Check database
-            db_template = Template.query.filter_by(id=template_id).first()
-            
-            if not db_template:
+            if template_id not in db_ids:
                 missing_in_db.append({
                     'id': template_id,
                     'name': template_data['name'],
@@ -142,15 +182,7 @@ def verify_all_templates():
                 })
                 continue
             
-            # Check file exists
-            file_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                'static',
-                'templates',
-                filename
-            )
-            
-            if not os.path.exists(file_path):
+            if filename not in existing_files:
                 missing_files.append({
                     'id': template_id,
                     'name': template_data['name'],
@@ -162,7 +194,7 @@ def verify_all_templates():
                     'name': template_data['name']
                 })
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'total_in_catalog': len(catalog),
             'missing_in_db': len(missing_in_db),
@@ -173,7 +205,7 @@ def verify_all_templates():
         }), 200
     
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
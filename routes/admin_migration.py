@@ -4,41 +4,79 @@ This endpoint runs database migrations and should be deleted after use
 """
 from flask import Blueprint, jsonify
 from database import db
+from sqlalchemy import bindparam
 import logging
 
 logger = logging.getLogger(__name__)
 
 admin_migration_bp = Blueprint('admin_migration', __name__, url_prefix='/admin')
 
+# Columns added to the users table, in order, with their DDL types
+MIGRATION_COLUMNS = {
+    'reset_token': 'VARCHAR(100)',
+    'reset_token_expires': 'TIMESTAMP',
+}
+
+# Composite (user_id, date) indexes behind the per-user account and AI usage queries.
+# They are declared on the models; this creates them on databases built before they existed.
+MIGRATION_INDEXES = (
+    ('download_history', 'idx_download_history_user_date'),
+    ('ai_generator_history', 'idx_ai_generator_history_user_created'),
+    ('ai_suggestion_history', 'idx_ai_suggestion_history_user_created'),
+    ('template_purchase', 'idx_template_purchase_user_purchased'),
+    ('payments', 'idx_payments_user_created'),
+    ('ai_usage_log', 'idx_ai_usage_user_timestamp'),
+)
+
 @admin_migration_bp.route('/run-migration-2025-10-19', methods=['GET'])
 def run_migration():
     """Run database migration to add missing columns"""
     try:
-        # Check if columns already exist
         from sqlalchemy import inspect, text
-        inspector = inspect(db.engine)
-        columns = [col['name'] for col in inspector.get_columns('users')]
-        
-        migrations_needed = []
-        migrations_completed = []
-        
-        # Check and add reset_token column
-        if 'reset_token' not in columns:
-            db.session.execute(text('ALTER TABLE users ADD COLUMN reset_token VARCHAR(100)'))
-            migrations_needed.append('reset_token')
-            migrations_completed.append('Added reset_token column')
-            logger.info("Added reset_token column to users table")
-        else:
-            logger.info("reset_token column already exists")
-        
-        # Check and add reset_token_expires column
-        if 'reset_token_expires' not in columns:
-            db.session.execute(text('ALTER TABLE users ADD COLUMN reset_token_expires TIMESTAMP'))
-            migrations_needed.append('reset_token_expires')
-            migrations_completed.append('Added reset_token_expires column')
-            logger.info("Added reset_token_expires column to users table")
+        
+        # Probe only the columns this migration adds
+        if db.engine.dialect.name == 'postgresql':
+            columns = set(db.session.execute(text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = 'users' AND column_name IN :names"
+            ).bindparams(bindparam('names', expanding=True)), {'names': list(MIGRATION_COLUMNS)}).scalars())
         else:
-            logger.info("reset_token_expires column already exists")
+            columns = {col['name'] for col in inspect(db.engine).get_columns('users')}
+        
+        migrations_needed = [name for name in MIGRATION_COLUMNS if name not in columns]
+        migrations_completed = [f'Added {name} column' for name in migrations_needed]
+        
+        for name in MIGRATION_COLUMNS:
+            if name in columns:
+                logger.info(f"{name} column already exists")
+        
+        if migrations_needed:
+            if db.engine.dialect.name == 'postgresql':
+                # One idempotent ALTER adding every missing column
+                clauses = ', '.join(
+                    f'ADD COLUMN IF NOT EXISTS {name} {MIGRATION_COLUMNS[name]}' for name in migrations_needed
+                )
+                db.session.execute(text(f'ALTER TABLE users {clauses}'))
+            else:
+                # SQLite only accepts one ADD COLUMN per ALTER TABLE
+                for name in migrations_needed:
+                    db.session.execute(text(f'ALTER TABLE users ADD COLUMN {name} {MIGRATION_COLUMNS[name]}'))
+            for name in migrations_needed:
+                logger.info(f"Added {name} column to users table")
+        
+        # Create any missing indexes (CREATE INDEX is skipped for ones that already exist)
+        import models  # noqa: F401 - registers the model tables on db.metadata
+        indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+        connection = db.session.connection()
+        inspector = inspect(connection)
+        for table_name, index_name in MIGRATION_INDEXES:
+            if not inspector.has_table(table_name):
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table_name)}
+            if index_name not in existing:
+                indexes[index_name].create(bind=connection)
+                migrations_completed.append(f'Added {index_name} index')
+                logger.info(f"Added {index_name} index to {table_name} table")
         
         # Commit changes
         db.session.commit()
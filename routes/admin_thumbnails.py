@@ -2,7 +2,8 @@
 Admin route to update template thumbnails
 Safe standalone route that can be enabled/disabled easily
 """
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, jsonify, current_app, request
+from sqlalchemy import text
 import os
 import logging
 
@@ -10,6 +11,61 @@ logger = logging.getLogger(__name__)
 
 admin_thumbnails_bp = Blueprint('admin_thumbnails', __name__)
 
+# Set every preview_image from its filename in one statement (extension swapped for .png),
+# touching only rows whose value would actually change
+_THUMBNAIL_URL_SQL = "'/static/thumbnails/' || regexp_replace(filename, '\\.[^.]+$', '') || '.png'"
+BULK_THUMBNAIL_UPDATE = text(
+    "UPDATE templates "
+    f"SET preview_image = {_THUMBNAIL_URL_SQL} "
+    "WHERE filename IS NOT NULL AND filename <> '' "
+    f"AND preview_image IS DISTINCT FROM {_THUMBNAIL_URL_SQL}"
+)
+
+def _update_thumbnails_sql(db):
+    """Bulk UPDATE path; returns (total, updated, skipped, errors)"""
+    total = db.session.execute(text("SELECT COUNT(*) FROM templates")).scalar()
+    result = db.session.execute(BULK_THUMBNAIL_UPDATE)
+    updated = result.rowcount
+    return total, updated, total - updated, []
+
+def _update_thumbnails_orm(db, Template):
+    """Per-row ORM path, kept for debugging and for databases without regexp_replace"""
+    # Get all templates
+    templates = Template.query.all()
+    total = len(templates)
+    
+    updated = 0
+    skipped = 0
+    errors = []
+    
+    for template in templates:
+        try:
+            # Generate thumbnail filename from template filename
+            if template.filename:
+                base_name = os.path.splitext(template.filename)[0]
+                thumb_filename = f"{base_name}.png"
+                thumb_url = f"/static/thumbnails/{thumb_filename}"
+                
+                # Leave rows that already point at the right thumbnail clean
+                if template.preview_image == thumb_url:
+                    skipped += 1
+                    continue
+                
+                # Update the template (use preview_image field)
+                template.preview_image = thumb_url
+                updated += 1
+                
+                if updated % 100 == 0:
+                    logger.info(f"Updated {updated} templates so far...")
+            else:
+                skipped += 1
+                
+        except Exception as e:
+            errors.append(f"Template {template.id}: {str(e)}")
+            logger.error(f"Error updating template {template.id}: {e}")
+    
+    return total, updated, skipped, errors
+
 @admin_thumbnails_bp.route('/admin/update-thumbnails-now', methods=['GET'])
 def update_thumbnails_now():
     """Update all templates with thumbnail URLs - safe version"""
@@ -19,34 +75,12 @@ def update_thumbnails_now():
     try:
         logger.info("Starting thumbnail update process")
         
-        # Get all templates
-        templates = Template.query.all()
-        total = len(templates)
-        
-        updated = 0
-        skipped = 0
-        errors = []
-        
-        for template in templates:
-            try:
-                # Generate thumbnail filename from template filename
-                if template.filename:
-                    base_name = os.path.splitext(template.filename)[0]
-                    thumb_filename = f"{base_name}.png"
-                    thumb_url = f"/static/thumbnails/{thumb_filename}"
-                    
-                    # Update the template (use preview_image field)
-                    template.preview_image = thumb_url
-                    updated += 1
-                    
-                    if updated % 100 == 0:
-                        logger.info(f"Updated {updated} templates so far...")
-                else:
-                    skipped += 1
-                    
-            except Exception as e:
-                errors.append(f"Template {template.id}: {str(e)}")
-                logger.error(f"Error updating template {template.id}: {e}")
+        # regexp_replace is PostgreSQL-only; other databases (local SQLite) use the ORM loop
+        use_orm = request.args.get('mode') == 'orm' or db.engine.dialect.name != 'postgresql'
+        if use_orm:
+            total, updated, skipped, errors = _update_thumbnails_orm(db, Template)
+        else:
+            total, updated, skipped, errors = _update_thumbnails_sql(db)
         
         # Commit all changes at once
         db.session.commit()
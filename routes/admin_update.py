@@ -5,9 +5,12 @@ Admin API for Template Updates
 Temporary endpoint to update template names and descriptions
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from sqlalchemy import update
 import logging
 
+from utils.fast_json import ojsonify, request_json
+
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin_update', __name__, url_prefix='/api/admin')
@@ -18,31 +21,37 @@ def update_templates():
     try:
         from database import db, Template
         
-        data = request.get_json()
+        data = request_json(request)
         
         if not data or 'templates' not in data:
-            return jsonify({'success': False, 'error': 'No template data provided'}), 400
+            return ojsonify({'success': False, 'error': 'No template data provided'}), 400
         
         templates = data['templates']
         rename_category = data.get('rename_category', {})
         
-        updated_count = 0
         renamed_count = 0
         
-        # Update each template
-        for template_data in templates:
-            filename = template_data['filename']
-            name = template_data['name']
-            description = template_data['description']
-            category = template_data['category']
-            
-            template = Template.query.filter_by(filename=filename).first()
-            
-            if template:
-                template.name = name
-                template.description = description
-                template.category = category
-                updated_count += 1
+        # Look up the ids of all matching templates with a single query
+        filenames = [t['filename'] for t in templates]
+        filename_to_id = dict(
+            db.session.query(Template.filename, Template.id)
+            .filter(Template.filename.in_(filenames))
+            .all()
+        )
+        
+        # Update matching templates in one batched UPDATE
+        mappings = [
+            {
+                'id': filename_to_id[template_data['filename']],
+                'name': template_data['name'],
+                'description': template_data['description'],
+                'category': template_data['category'],
+            }
+            for template_data in templates
+            if template_data['filename'] in filename_to_id
+        ]
+        db.session.bulk_update_mappings(Template, mappings)
+        updated_count = len(mappings)
         
         # Rename category if specified
         if rename_category:
@@ -50,17 +59,17 @@ def update_templates():
             to_cat = rename_category.get('to')
             
             if from_cat and to_cat:
-                templates_to_rename = Template.query.filter_by(category=from_cat).all()
-                for template in templates_to_rename:
-                    template.category = to_cat
-                    renamed_count += 1
+                result = db.session.execute(
+                    update(Template).where(Template.category == from_cat).values(category=to_cat)
+                )
+                renamed_count = result.rowcount
         
         # Commit all changes
         db.session.commit()
         
         logger.info(f"Updated {updated_count} templates, renamed {renamed_count} categories")
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'updated': updated_count,
             'renamed': renamed_count,
@@ -69,5 +78,5 @@ def update_templates():
     
     except Exception as e:
         logger.error(f"Template update error: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
@@ -3,91 +3,97 @@ AI Template Download Route
 Generates and downloads AI-created templates
 """
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, send_file
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 import io
 import logging
 
+from utils.fast_json import ojsonify, request_json
+
 logger = logging.getLogger(__name__)
 
 ai_download_bp = Blueprint('ai_download', __name__)
 
+# Styles are immutable in openpyxl, so build them once and share them across requests
+_HEADER_FILL = PatternFill(start_color="1E3A8A", end_color="1E3A8A", fill_type="solid")
+_HEADER_FONT = Font(color="FFFFFF", bold=True, size=12)
+_TITLE_FONT = Font(bold=True, size=16, color="1E3A8A")
+_WRAP_ALIGN = Alignment(wrap_text=True)
+_CENTER_ALIGN = Alignment(horizontal='center')
+_HEADER_LABELS = ("Section", "Description", "Status", "Notes")
+
 @ai_download_bp.route('/api/ai/download-generated', methods=['POST'])
 def download_generated_template():
     """
     Generate and download an AI-created Excel template
     """
     try:
-        data = request.get_json()
+        data = request_json(request)
         template_name = data.get('template_name', 'AI_Generated_Template')
         description = data.get('description', '')
         sections = data.get('sections', [])
         
-        # Create Excel workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Template"
+        # Create Excel workbook in write-only mode so rows stream out instead of
+        # building a full cell object graph
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Template")
         
-        # Header styling
-        header_fill = PatternFill(start_color="1E3A8A", end_color="1E3A8A", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True, size=12)
+        # Column widths must be set before any rows are written
+        ws.column_dimensions['A'].width = 30
+        ws.column_dimensions['B'].width = 40
+        ws.column_dimensions['C'].width = 15
+        ws.column_dimensions['D'].width = 30
         
         # Title
-        ws['A1'] = template_name
-        ws['A1'].font = Font(bold=True, size=16, color="1E3A8A")
-        ws.merge_cells('A1:D1')
+        title_cell = WriteOnlyCell(ws, value=template_name)
+        title_cell.font = _TITLE_FONT
+        ws.append([title_cell])
+        ws.merged_cells.add('A1:D1')
         
         # Description
-        ws['A2'] = description
-        ws.merge_cells('A2:D2')
-        ws['A2'].alignment = Alignment(wrap_text=True)
+        description_cell = WriteOnlyCell(ws, value=description)
+        description_cell.alignment = _WRAP_ALIGN
+        ws.append([description_cell])
+        ws.merged_cells.add('A2:D2')
         
-        # Add sections
-        row = 4
-        ws[f'A{row}'] = "Section"
-        ws[f'B{row}'] = "Description"
-        ws[f'C{row}'] = "Status"
-        ws[f'D{row}'] = "Notes"
+        ws.append([])
         
-        # Style header row
-        for col in ['A', 'B', 'C', 'D']:
-            cell = ws[f'{col}{row}']
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
+        # Add sections, styling the header row
+        header_cells = []
+        for label in _HEADER_LABELS:
+            cell = WriteOnlyCell(ws, value=label)
+            cell.fill = _HEADER_FILL
+            cell.font = _HEADER_FONT
+            cell.alignment = _CENTER_ALIGN
+            header_cells.append(cell)
+        ws.append(header_cells)
         
         # Add section rows
-        row += 1
         for section in sections:
-            ws[f'A{row}'] = section
-            ws[f'B{row}'] = f"Details for {section}"
-            ws[f'C{row}'] = "Not Started"
-            ws[f'D{row}'] = ""
-            row += 1
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 40
-        ws.column_dimensions['C'].width = 15
-        ws.column_dimensions['D'].width = 30
+            ws.append([section, f"Details for {section}", "Not Started", ""])
         
-        # Save to BytesIO
+        # Save to BytesIO (openpyxl needs a seekable target for the zip)
         output = io.BytesIO()
         wb.save(output)
+        size = output.tell()
         output.seek(0)
         
         # Generate filename
         filename = f"{template_name.replace(' ', '_')}.xlsx"
         
-        return send_file(
+        response = send_file(
             output,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
-            download_name=filename
+            download_name=filename,
+            conditional=True
         )
+        response.content_length = size
+        return response
         
     except Exception as e:
         logger.error(f"Error generating template: {e}")
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
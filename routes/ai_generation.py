@@ -3,9 +3,14 @@ PMBlueprints AI Generation Routes
 AI-powered template generation with comprehensive guardrails
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, Response, stream_with_context
 from ai_guardrails import guardrails
-import os
+from ai_response_cache import response_cache, RequestCoalescer
+from monitoring import track_ai_generation
+from background_tasks import submit
+from utils.fast_json import dumps, ojsonify
+from functools import lru_cache
+import hashlib
 import logging
 
 # Configure logging
@@ -15,18 +20,15 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 ai_bp = Blueprint('ai', __name__, url_prefix='/api/ai')
 
-# Check if OpenAI API key is available
-OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-AI_ENABLED = OPENAI_API_KEY is not None
+# Shared per-process OpenAI client (None when no API key is configured)
+from openai_client import client, AI_ENABLED
 
-if AI_ENABLED:
-    try:
-        from openai import OpenAI
-        client = OpenAI()  # API key from environment
-        logger.info("OpenAI client initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize OpenAI client: {e}")
-        AI_ENABLED = False
+# OpenAI calls currently in flight, keyed like the response cache
+_inflight = RequestCoalescer()
+
+# Cache lifetimes (seconds) for the read-only transparency endpoints
+DISCLOSURE_MAX_AGE = 3600
+METRICS_MAX_AGE = 15
 
 
 @ai_bp.route('/generate', methods=['POST'])
@@ -46,10 +48,10 @@ def generate_template():
     """
     try:
         # Get request data
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
         
         if not data:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No data provided'
             }), 400
@@ -66,7 +68,7 @@ def generate_template():
         input_text = f"{project_description} {additional_requirements}".strip()
         
         if not input_text:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Project description is required'
             }), 400
@@ -83,7 +85,7 @@ def generate_template():
         )
         
         if not validation_result['valid']:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Input validation failed',
                 'details': validation_result['errors'],
@@ -95,34 +97,29 @@ def generate_template():
         
         # ========== AI GENERATION ==========
         if not AI_ENABLED:
-            # Fallback to pre-built template
+            # Fallback to pre-built template; the body only depends on the
+            # fallback content, so it is serialized once and reused
             content = guardrails.get_fallback_content(template_type)
-            return jsonify({
-                'success': True,
-                'content': content,
-                'ai_generated': False,
-                'fallback_used': True,
-                'message': 'AI generation not available, using pre-built template',
-                'metadata': validation_result['metadata']
-            })
+            return Response(_unavailable_fallback_body(content), mimetype='application/json')
         
         try:
-            # Generate content with OpenAI
-            generated_content = _generate_with_openai(
-                template_type=template_type,
-                project_description=sanitized_input,
-                industry=industry
-            )
+            # Reuse a cached completion for an identical request, otherwise call OpenAI
+            cache_key = response_cache.make_key(template_type, industry, sanitized_input)
+            generated_content = response_cache.get(cache_key)
+            cache_hit = generated_content is not None
+            
+            if not cache_hit:
+                # Identical requests already in flight share that OpenAI call
+                generated_content, _ = _inflight.run(cache_key, lambda: _generate_with_openai(
+                    template_type=template_type,
+                    project_description=sanitized_input,
+                    industry=industry
+                ))
             
             # ========== GUARDRAILS: OUTPUT VALIDATION ==========
             output_validation = guardrails.validate_ai_output(
                 output_text=generated_content,
-                context={
-                    'template_type': template_type,
-                    'industry': industry,
-                    'min_length': 200,
-                    'key_terms': [template_type, industry, 'project']
-                }
+                context=output_validation_context(template_type, industry)
             )
             
             if not output_validation['valid']:
@@ -130,7 +127,7 @@ def generate_template():
                 logger.warning(f"AI output failed validation: {output_validation['errors']}")
                 content = guardrails.get_fallback_content(template_type)
                 
-                return jsonify({
+                return ojsonify({
                     'success': True,
                     'content': content,
                     'ai_generated': False,
@@ -140,22 +137,27 @@ def generate_template():
                     'metadata': validation_result['metadata']
                 })
             
-            # Track AI generation in monitoring system
-            from monitoring import track_ai_generation
-            track_ai_generation(user_id)
+            # Only completions that passed output validation are cached
+            if not cache_hit:
+                response_cache.set(cache_key, generated_content)
+            
+            # Track AI generation in monitoring system (off the response path)
+            submit(track_ai_generation, user_id)
+            
+            # Fold the output metadata into the request metadata rather than copying both
+            metadata = validation_result['metadata']
+            metadata.update(output_validation['metadata'])
             
             # Return successful AI-generated content
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'content': generated_content,
                 'ai_generated': True,
                 'fallback_used': False,
+                'cached': cache_hit,
                 'quality_scores': output_validation['quality_scores'],
                 'bias_scores': output_validation['bias_scores'],
-                'metadata': {
-                    **validation_result['metadata'],
-                    **output_validation['metadata']
-                },
+                'metadata': metadata,
                 'warnings': output_validation['warnings']
             })
             
@@ -163,7 +165,7 @@ def generate_template():
             logger.error(f"AI generation error: {e}")
             # Fallback on error
             content = guardrails.get_fallback_content(template_type)
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'content': content,
                 'ai_generated': False,
@@ -174,13 +176,164 @@ def generate_template():
     
     except Exception as e:
         logger.error(f"Unexpected error in generate_template: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Internal server error',
             'details': str(e)
         }), 500
 
 
+@ai_bp.route('/generate/stream', methods=['POST'])
+def generate_template_stream():
+    """
+    Stream AI-generated template content as Server-Sent Events
+    
+    Takes the same request body as /generate. Emits one `data: {"delta": ...}` frame per
+    chunk as OpenAI produces it, then a terminal `event: done` frame carrying the
+    output-validation results (or fallback content if validation fails).
+    """
+    try:
+        data = request.get_json(silent=True, cache=False)
+        
+        if not data:
+            return ojsonify({
+                'success': False,
+                'error': 'No data provided'
+            }), 400
+        
+        user_id = data.get('user_id', 'anonymous')
+        user_tier = data.get('user_tier', 'free')
+        template_type = data.get('template_type', 'project_charter')
+        project_description = data.get('project_description', '')
+        industry = data.get('industry', 'general')
+        additional_requirements = data.get('additional_requirements', '')
+        
+        input_text = f"{project_description} {additional_requirements}".strip()
+        
+        if not input_text:
+            return ojsonify({
+                'success': False,
+                'error': 'Project description is required'
+            }), 400
+        
+        # ========== GUARDRAILS: INPUT VALIDATION ==========
+        validation_result = guardrails.validate_ai_request(
+            user_id=user_id,
+            input_text=input_text,
+            user_tier=user_tier,
+            context={
+                'template_type': template_type,
+                'industry': industry
+            }
+        )
+        
+        if not validation_result['valid']:
+            return ojsonify({
+                'success': False,
+                'error': 'Input validation failed',
+                'details': validation_result['errors'],
+                'warnings': validation_result['warnings']
+            }), 400
+        
+        sanitized_input = validation_result['sanitized_input']
+        
+        if not AI_ENABLED:
+            content = guardrails.get_fallback_content(template_type)
+            return ojsonify({
+                'success': True,
+                'content': content,
+                'ai_generated': False,
+                'fallback_used': True,
+                'message': 'AI generation not available, using pre-built template',
+                'metadata': validation_result['metadata']
+            })
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in generate_template_stream: {e}")
+        return ojsonify({
+            'success': False,
+            'error': 'Internal server error',
+            'details': str(e)
+        }), 500
+    
+    def events():
+        cache_key = response_cache.make_key(template_type, industry, sanitized_input)
+        cached_content = response_cache.get(cache_key)
+        
+        # Forward chunks as they arrive, keeping a copy for output validation
+        buffer = []
+        try:
+            if cached_content is not None:
+                buffer.append(cached_content)
+                yield _sse({'delta': cached_content})
+            else:
+                for delta in _stream_with_openai(
+                    template_type=template_type,
+                    project_description=sanitized_input,
+                    industry=industry
+                ):
+                    buffer.append(delta)
+                    yield _sse({'delta': delta})
+        except Exception as e:
+            logger.error(f"AI streaming error: {e}")
+            yield _sse({
+                'success': True,
+                'content': guardrails.get_fallback_content(template_type),
+                'ai_generated': False,
+                'fallback_used': True,
+                'message': f'AI generation failed: {str(e)}',
+                'metadata': validation_result['metadata']
+            }, event='done')
+            return
+        
+        generated_content = ''.join(buffer)
+        
+        # ========== GUARDRAILS: OUTPUT VALIDATION ==========
+        output_validation = guardrails.validate_ai_output(
+            output_text=generated_content,
+            context=output_validation_context(template_type, industry)
+        )
+        
+        if not output_validation['valid']:
+            logger.warning(f"AI output failed validation: {output_validation['errors']}")
+            yield _sse({
+                'success': True,
+                'content': guardrails.get_fallback_content(template_type),
+                'ai_generated': False,
+                'fallback_used': True,
+                'message': 'AI output did not meet quality standards, using pre-built template',
+                'validation_details': output_validation,
+                'metadata': validation_result['metadata']
+            }, event='done')
+            return
+        
+        if cached_content is None:
+            response_cache.set(cache_key, generated_content)
+        
+        submit(track_ai_generation, user_id)
+        
+        # Fold the output metadata into the request metadata rather than copying both
+        metadata = validation_result['metadata']
+        metadata.update(output_validation['metadata'])
+        
+        yield _sse({
+            'success': True,
+            'ai_generated': True,
+            'fallback_used': False,
+            'cached': cached_content is not None,
+            'quality_scores': output_validation['quality_scores'],
+            'bias_scores': output_validation['bias_scores'],
+            'metadata': metadata,
+            'warnings': output_validation['warnings']
+        }, event='done')
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @ai_bp.route('/enhance', methods=['POST'])
 def enhance_template():
     """
@@ -195,10 +348,10 @@ def enhance_template():
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
         
         if not data:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No data provided'
             }), 400
@@ -209,7 +362,7 @@ def enhance_template():
         enhancement_type = data.get('enhancement_type', 'improve_clarity')
         
         if not template_content:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Template content is required'
             }), 400
@@ -223,7 +376,7 @@ def enhance_template():
         )
         
         if not validation_result['valid']:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Input validation failed',
                 'details': validation_result['errors']
@@ -235,7 +388,7 @@ def enhance_template():
             {'min_length': 100, 'key_terms': ['project', 'management']}
         )
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'enhanced_content': template_content,
             'original_content': template_content,
@@ -251,7 +404,7 @@ def enhance_template():
     
     except Exception as e:
         logger.error(f"Error in enhance_template: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Internal server error',
             'details': str(e)
@@ -267,15 +420,17 @@ def get_ai_metrics():
     try:
         metrics = guardrails.get_performance_metrics()
         
-        return jsonify({
+        # Metrics move slowly: let clients revalidate with the ETag for a short window
+        body = dumps({
             'success': True,
             'metrics': metrics,
             'timestamp': guardrails.audit_log[-1]['timestamp'] if guardrails.audit_log else None
         })
+        return _conditional_json(body, _etag(body), max_age=METRICS_MAX_AGE, public=False)
     
     except Exception as e:
         logger.error(f"Error getting metrics: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -296,7 +451,7 @@ def get_audit_log():
         # Return most recent entries
         recent_log = audit_log[-limit:] if len(audit_log) > limit else audit_log
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'audit_log': recent_log,
             'total_entries': len(audit_log),
@@ -305,7 +460,7 @@ def get_audit_log():
     
     except Exception as e:
         logger.error(f"Error getting audit log: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -324,10 +479,10 @@ def record_user_consent():
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
         
         if not data:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No data provided'
             }), 400
@@ -337,7 +492,7 @@ def record_user_consent():
         consent_type = data.get('consent_type', 'ai_generation')
         
         if not user_id:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'User ID is required'
             }), 400
@@ -349,7 +504,7 @@ def record_user_consent():
             'consent_type': consent_type
         })
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': 'Consent recorded successfully',
             'user_id': user_id,
@@ -358,7 +513,7 @@ def record_user_consent():
     
     except Exception as e:
         logger.error(f"Error recording consent: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -370,16 +525,13 @@ def get_ai_disclosure():
     Get AI usage disclosure information for transparency
     """
     try:
-        disclosure = guardrails.get_ai_disclosure()
-        
-        return jsonify({
-            'success': True,
-            'disclosure': disclosure
-        })
+        # The disclosure never changes at runtime, so browsers and CDNs may cache it
+        body, etag = _disclosure_body()
+        return _conditional_json(body, etag, max_age=DISCLOSURE_MAX_AGE, public=True)
     
     except Exception as e:
         logger.error(f"Error getting disclosure: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -387,12 +539,13 @@ def get_ai_disclosure():
 
 # ========== HELPER FUNCTIONS ==========
 
-def _generate_with_openai(template_type: str, project_description: str, industry: str) -> str:
-    """
-    Generate template content using OpenAI API
-    """
-    # Build prompt
-    prompt = f"""Generate a professional {template_type} for a {industry} project.
+# Prompt skeleton: built once, only the variable slots are filled per request
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a professional project management expert specializing in creating PMI-compliant templates. Generate high-quality, professional, and unbiased content."
+}
+
+PROMPT_TEMPLATE = """Generate a professional {template_type} for a {industry} project.
 
 Project Description: {project_description}
 
@@ -405,19 +558,57 @@ Requirements:
 
 Generate a comprehensive {template_type} that meets these requirements."""
 
-    # Call OpenAI API
+
+def build_messages(template_type: str, project_description: str, industry: str) -> list:
+    """
+    Build the chat messages for a template generation request
+    """
+    prompt = _specialized_prompt(template_type, industry).format_map({
+        'project_description': project_description
+    })
+    return [SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+
+
+@lru_cache(maxsize=256)
+def _specialized_prompt(template_type: str, industry: str) -> str:
+    """
+    PROMPT_TEMPLATE with the template type and industry filled in, leaving only
+    the project description slot. There are few distinct pairs in practice, so
+    each is rendered once.
+    """
+    return PROMPT_TEMPLATE.format_map({
+        'template_type': _escape_format(template_type),
+        'industry': _escape_format(industry),
+        'project_description': '{project_description}'
+    })
+
+
+@lru_cache(maxsize=256)
+def output_validation_context(template_type: str, industry: str) -> dict:
+    """
+    Output-validation context for a (template_type, industry) pair, built once
+    per pair. The guardrails only read it.
+    """
+    return {
+        'template_type': template_type,
+        'industry': industry,
+        'min_length': 200,
+        'key_terms': [template_type, industry, 'project']
+    }
+
+
+def _escape_format(value: str) -> str:
+    """Escape braces so user-supplied values survive a second format pass"""
+    return value.replace('{', '{{').replace('}', '}}')
+
+
+def _generate_with_openai(template_type: str, project_description: str, industry: str) -> str:
+    """
+    Generate template content using OpenAI API
+    """
     response = client.chat.completions.create(
         model="gpt-4.1-mini",  # Using available model
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a professional project management expert specializing in creating PMI-compliant templates. Generate high-quality, professional, and unbiased content."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
+        messages=build_messages(template_type, project_description, industry),
         max_tokens=2000,
         temperature=0.7
     )
@@ -425,6 +616,78 @@ Generate a comprehensive {template_type} that meets these requirements."""
     return response.choices[0].message.content
 
 
+def _stream_with_openai(template_type: str, project_description: str, industry: str):
+    """
+    Generate template content using OpenAI API, yielding text deltas as they arrive
+    """
+    stream = client.chat.completions.create(
+        model="gpt-4.1-mini",
+        messages=build_messages(template_type, project_description, industry),
+        max_tokens=2000,
+        temperature=0.7,
+        stream=True
+    )
+    
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+@lru_cache(maxsize=None)
+def _unavailable_fallback_body(content: str) -> bytes:
+    """
+    JSON body returned when AI generation is not configured.
+    Request validation only contributes the static AI disclosure to the metadata.
+    """
+    return dumps({
+        'success': True,
+        'content': content,
+        'ai_generated': False,
+        'fallback_used': True,
+        'message': 'AI generation not available, using pre-built template',
+        'metadata': {'ai_disclosure': guardrails.get_ai_disclosure()}
+    })
+
+
+@lru_cache(maxsize=1)
+def _disclosure_body() -> tuple:
+    """
+    Serialized /disclosure response and its ETag, built on first use
+    """
+    body = dumps({
+        'success': True,
+        'disclosure': guardrails.get_ai_disclosure()
+    })
+    return body, _etag(body)
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.md5(body, usedforsecurity=False).hexdigest()
+
+
+def _conditional_json(body: bytes, etag: str, max_age: int, public: bool) -> Response:
+    """
+    JSON response with a strong ETag and Cache-Control; answers a matching
+    If-None-Match with 304 Not Modified
+    """
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.max_age = max_age
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+    return response.make_conditional(request)
+
+
+def _sse(payload: dict, event: str = None) -> str:
+    """
+    Format a Server-Sent Events frame
+    """
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {dumps(payload).decode('utf-8')}\n\n"
+
+
 def register_ai_routes(app):
     """
     Register AI routes with the Flask app
@@ -3,11 +3,25 @@ PMBlueprints AI Generation Routes - Secure Version
 AI-powered template generation with persistent usage tracking and comprehensive guardrails
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_login import login_required, current_user
+from sqlalchemy import select
 from ai_guardrails_persistent import create_guardrails
-import os
+from ai_response_cache import response_cache, RequestCoalescer
+from background_tasks import submit
+from database import db
+from models import AIUsageLog
+from routes.ai_generation import build_messages, output_validation_context
+from utils.fast_json import ojsonify
 import logging
+from typing import Tuple
+
+try:
+    from monitoring import track_ai_generation
+except ImportError:
+    # Monitoring is optional
+    def track_ai_generation(user_id=None):
+        pass
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,18 +30,11 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 ai_secure_bp = Blueprint('ai_secure', __name__, url_prefix='/api/ai')
 
-# Check if OpenAI API key is available
-OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-AI_ENABLED = OPENAI_API_KEY is not None
+# Shared per-process OpenAI client (None when no API key is configured)
+from openai_client import client, AI_ENABLED
 
-if AI_ENABLED:
-    try:
-        from openai import OpenAI
-        client = OpenAI()  # API key from environment
-        logger.info("OpenAI client initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize OpenAI client: {e}")
-        AI_ENABLED = False
+# OpenAI calls currently in flight, keyed like the response cache
+_inflight = RequestCoalescer()
 
 
 @ai_secure_bp.route('/generate', methods=['POST'])
@@ -46,10 +53,10 @@ def generate_template():
     """
     try:
         # Get request data
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
         
         if not data:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No data provided'
             }), 400
@@ -64,14 +71,11 @@ def generate_template():
         input_text = f"{project_description} {additional_requirements}".strip()
         
         if not input_text:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Project description is required'
             }), 400
         
-        # Import database session
-        from database import db
-        
         # Create guardrails instance with database session
         guardrails = create_guardrails(db.session)
         
@@ -95,8 +99,9 @@ def generate_template():
                 input_length=len(input_text),
                 error_message='; '.join(validation_result['errors'])
             )
+            db.session.commit()
             
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Input validation failed',
                 'details': validation_result['errors'],
@@ -121,8 +126,9 @@ def generate_template():
                 input_length=len(input_text),
                 output_length=len(content)
             )
+            db.session.commit()
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'content': content,
                 'ai_generated': False,
@@ -132,22 +138,26 @@ def generate_template():
             })
         
         try:
-            # Generate content with OpenAI
-            generated_content = _generate_with_openai(
-                template_type=template_type,
-                project_description=sanitized_input,
-                industry=industry
-            )
+            # Reuse a cached completion for an identical request, otherwise call OpenAI
+            cache_key = response_cache.make_key(template_type, industry, sanitized_input)
+            generated_content = response_cache.get(cache_key)
+            cache_hit = generated_content is not None
+            tokens_used = 0  # cache hits cost no API tokens
+            
+            if not cache_hit:
+                # Identical requests already in flight share that OpenAI call
+                (generated_content, tokens_used), shared = _inflight.run(cache_key, lambda: _generate_with_openai(
+                    template_type=template_type,
+                    project_description=sanitized_input,
+                    industry=industry
+                ))
+                if shared:
+                    tokens_used = 0  # the tokens are logged against the request that made the call
             
             # ========== GUARDRAILS: OUTPUT VALIDATION ==========
             output_validation = guardrails.validate_ai_output(
                 output_text=generated_content,
-                context={
-                    'template_type': template_type,
-                    'industry': industry,
-                    'min_length': 200,
-                    'key_terms': [template_type, industry, 'project']
-                }
+                context=output_validation_context(template_type, industry)
             )
             
             if not output_validation['valid']:
@@ -165,8 +175,9 @@ def generate_template():
                     output_length=len(generated_content),
                     error_message='Output validation failed'
                 )
+                db.session.commit()
                 
-                return jsonify({
+                return ojsonify({
                     'success': True,
                     'content': content,
                     'ai_generated': False,
@@ -176,6 +187,10 @@ def generate_template():
                     'metadata': validation_result['metadata']
                 })
             
+            # Only completions that passed output validation are cached
+            if not cache_hit:
+                response_cache.set(cache_key, generated_content)
+            
             # ========== INCREMENT USAGE COUNTER ==========
             guardrails.increment_usage(current_user)
             
@@ -187,29 +202,30 @@ def generate_template():
                 template_type=template_type,
                 input_length=len(input_text),
                 output_length=len(generated_content),
-                tokens_used=len(generated_content.split())  # Approximate
+                tokens_used=tokens_used
             )
             
-            # Commit database changes
+            # Commit the usage counter and log row together
             db.session.commit()
             
-            # Track in monitoring system
-            try:
-                from monitoring import track_ai_generation
-                track_ai_generation(current_user.id)
-            except:
-                pass  # Monitoring is optional
+            # Track in monitoring system (off the response path)
+            submit(track_ai_generation, current_user.id)
             
             # Calculate remaining generations
             monthly_limit = guardrails.MONTHLY_LIMITS.get(current_user.subscription_plan, 3)
             remaining = monthly_limit - current_user.ai_generations_used_this_month
             
+            # Fold the output metadata into the request metadata rather than copying both
+            metadata = validation_result['metadata']
+            metadata.update(output_validation['metadata'])
+            
             # Return successful AI-generated content
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'content': generated_content,
                 'ai_generated': True,
                 'fallback_used': False,
+                'cached': cache_hit,
                 'quality_scores': output_validation['quality_scores'],
                 'bias_scores': output_validation['bias_scores'],
                 'usage': {
@@ -218,10 +234,7 @@ def generate_template():
                     'remaining': remaining,
                     'reset_date': current_user.ai_generation_reset_date.isoformat() if current_user.ai_generation_reset_date else None
                 },
-                'metadata': {
-                    **validation_result['metadata'],
-                    **output_validation['metadata']
-                },
+                'metadata': metadata,
                 'warnings': output_validation['warnings']
             })
             
@@ -241,7 +254,7 @@ def generate_template():
             
             # Fallback on error
             content = guardrails.get_fallback_content(template_type)
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'content': content,
                 'ai_generated': False,
@@ -252,7 +265,7 @@ def generate_template():
     
     except Exception as e:
         logger.error(f"Unexpected error in generate_template: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Internal server error',
             'details': str(e)
@@ -266,7 +279,6 @@ def get_usage_stats():
     Get user's AI usage statistics
     """
     try:
-        from database import db
         guardrails = create_guardrails(db.session)
         
         # Reset if needed
@@ -277,7 +289,7 @@ def get_usage_stats():
         used = current_user.ai_generations_used_this_month or 0
         remaining = max(0, monthly_limit - used)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'usage': {
                 'subscription_plan': current_user.subscription_plan,
@@ -291,7 +303,7 @@ def get_usage_stats():
     
     except Exception as e:
         logger.error(f"Error getting usage stats: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Failed to retrieve usage statistics'
         }), 500
@@ -304,47 +316,39 @@ def get_usage_history():
     Get user's AI usage history
     """
     try:
-        from database import db
-        from sqlalchemy import text
-        
         # Get limit parameter
         limit = request.args.get('limit', 50, type=int)
         limit = min(limit, 100)  # Max 100 records
         
-        # Query usage log
-        query = text("""
-            SELECT 
-                request_type,
-                template_type,
-                timestamp,
-                success,
-                tokens_used,
-                input_length,
-                output_length
-            FROM ai_usage_log
-            WHERE user_id = :user_id
-            ORDER BY timestamp DESC
-            LIMIT :limit
-        """)
+        # Most recent entries first; served by the (user_id, timestamp) index
+        stmt = select(
+            AIUsageLog.request_type,
+            AIUsageLog.template_type,
+            AIUsageLog.timestamp,
+            AIUsageLog.success,
+            AIUsageLog.tokens_used,
+            AIUsageLog.input_length,
+            AIUsageLog.output_length
+        ).where(
+            AIUsageLog.user_id == current_user.id
+        ).order_by(
+            AIUsageLog.timestamp.desc()
+        ).limit(limit)
         
-        result = db.session.execute(query, {
-            'user_id': current_user.id,
-            'limit': limit
-        })
-        
-        history = []
-        for row in result:
-            history.append({
-                'request_type': row[0],
-                'template_type': row[1],
-                'timestamp': row[2].isoformat() if row[2] else None,
-                'success': row[3],
-                'tokens_used': row[4],
-                'input_length': row[5],
-                'output_length': row[6]
-            })
+        history = [
+            {
+                'request_type': row.request_type,
+                'template_type': row.template_type,
+                'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+                'success': row.success,
+                'tokens_used': row.tokens_used,
+                'input_length': row.input_length,
+                'output_length': row.output_length
+            }
+            for row in db.session.execute(stmt)
+        ]
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'history': history,
             'count': len(history)
@@ -352,7 +356,7 @@ def get_usage_history():
     
     except Exception as e:
         logger.error(f"Error getting usage history: {e}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Failed to retrieve usage history'
         }), 500
@@ -360,42 +364,21 @@ def get_usage_history():
 
 # ========== HELPER FUNCTIONS ==========
 
-def _generate_with_openai(template_type: str, project_description: str, industry: str) -> str:
+def _generate_with_openai(template_type: str, project_description: str, industry: str) -> Tuple[str, int]:
     """
     Generate template content using OpenAI API
-    """
-    # Build prompt
-    prompt = f"""Generate a professional {template_type} for a {industry} project.
-
-Project Description: {project_description}
 
-Requirements:
-- Follow PMI standards
-- Use professional language
-- Include all standard sections for a {template_type}
-- Be specific and actionable
-- Maintain inclusive and unbiased language
-
-Generate a comprehensive {template_type} that meets these requirements."""
-
-    # Call OpenAI API
+    Returns (content, total_tokens) using the token count reported by the API
+    """
     response = client.chat.completions.create(
         model="gpt-4.1-mini",  # Using available model
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a professional project management expert specializing in creating PMI-compliant templates. Generate high-quality, professional, and unbiased content."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
+        messages=build_messages(template_type, project_description, industry),
         max_tokens=2000,
         temperature=0.7
     )
     
-    return response.choices[0].message.content
+    tokens_used = response.usage.total_tokens if response.usage else 0
+    return response.choices[0].message.content, tokens_used
 
 
 def register_ai_secure_routes(app):
@@ -3,22 +3,70 @@ AI Generator Routes
 Handles AI-powered document generation - optimized for speed and cost efficiency
 """
 
-from flask import Blueprint, render_template, request, jsonify, send_file, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, send_file, flash, redirect, url_for, Response, stream_with_context
 from flask_login import login_required, current_user
 import logging
 import os
-from openai import OpenAI
+import re
 from datetime import datetime
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from openpyxl import Workbook
 import io
+from sqlalchemy import insert, update
+from xml.sax.saxutils import escape as xml_escape
+
+from openai_client import client, AI_ENABLED, log_prompt_cache_usage
+from ai_response_cache import response_cache
+from utils.fast_json import dumps, loads
+from utils.prompt_text import normalize_prompt_text
 
 logger = logging.getLogger(__name__)
 
 ai_generator_bp = Blueprint('ai_generator', __name__, url_prefix='/ai/generator')
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# OpenAI Batch API settings for queued (non-urgent) generations
+BATCH_ENDPOINT = '/v1/chat/completions'
+BATCH_FAILED_STATUSES = ('failed', 'expired', 'cancelled')
+# Queued rows not yet saved: 'processing' ones are claimed by a request saving them
+BATCH_QUEUED_STATUSES = ('pending', 'processing')
+
+# Model and completion budget by document type (keys lowercased). The mini model
+# handles most PM documents; only full plans get the larger model and budget.
+DEFAULT_MODEL = 'gpt-4o-mini'
+DEFAULT_MAX_TOKENS = 2000
+MODEL_FOR_DOCUMENT = {
+    'full project plan': 'gpt-4o',
+    'project management plan': 'gpt-4o',
+}
+MAX_TOKENS_FOR_DOCUMENT = {
+    'project charter': 1200,
+    'risk register': 1500,
+    'stakeholder register': 1200,
+    'communication plan': 1500,
+    'status report': 1000,
+    'lessons learned': 1200,
+    'full project plan': 4000,
+    'project management plan': 4000,
+}
+
+# Characters dropped from download filenames: anything but letters, digits,
+# space, hyphen and underscore (\w is Unicode-aware, matching str.isalnum() plus '_')
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w \-]')
+
+# Request fields saved on AIGeneratorHistory (and AIGeneratorBatch while queued)
+_GENERATION_COLUMNS = ('project_name', 'project_type', 'industry', 'methodology', 'document_type', 'file_format')
+
+# Rendered documents are written here once, as {history_id}.{ext}, so downloads can
+# be served straight from disk instead of rebuilding the docx/xlsx every time
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'storage', 'generated')
+
+# Invariant system message, sent first on every call so OpenAI can cache the prefix
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an expert project management consultant. Create professional PM documents following PMI PMBOK standards. Be comprehensive yet concise."
+}
 
 @ai_generator_bp.route('/')
 @login_required
@@ -36,7 +84,7 @@ def generate():
     """Generate AI document - optimized for speed and cost"""
     from utils.subscription_security import check_usage_limit
     from database import db
-    from models import AIGeneratorHistory
+    from models import AIGeneratorBatch
     
     try:
         # Check usage quota
@@ -60,14 +108,26 @@ def generate():
         industry = data.get('industry', '').strip()
         methodology = data.get('methodology', 'Agile').strip()
         document_type = data.get('document_type', 'Project Charter').strip()
-        additional_details = data.get('additional_details', '').strip()
+        additional_details = normalize_prompt_text(data.get('additional_details', ''))
         
         # Validate required fields
         if not project_name or not project_type or not industry:
             return jsonify({'error': 'Missing required fields: project name, type, and industry are required'}), 400
         
-        # Build optimized prompt
-        prompt = f"""Create a professional {document_type} for this {methodology} project:
+        if not AI_ENABLED:
+            return jsonify({'error': 'AI service is not configured. Please contact support.'}), 503
+        
+        # Build optimized prompt: the document-type instructions come first and the
+        # project specifics last, so repeat document types share a cacheable prefix
+        prompt = f"""Create a professional {document_type} for a {methodology} project.
+
+Generate a comprehensive, PMI PMBOK-compliant {document_type} with:
+- All standard sections for this document type
+- Industry-specific considerations
+- Professional formatting
+- Actionable content ready for immediate use
+
+Be thorough but concise.
 
 Project Name: {project_name}
 Type: {project_type}
@@ -77,74 +137,78 @@ Methodology: {methodology}"""
         if additional_details:
             prompt += f"\nAdditional Details: {additional_details}"
         
-        prompt += f"""
-
-Generate a comprehensive, PMI PMBOK-compliant {document_type} with:
-- All standard sections for this document type
-- Industry-specific considerations
-- Professional formatting
-- Actionable content ready for immediate use
-
-Be thorough but concise."""
+        # Columns saved on the history row for this generation
+        generation = {
+            'project_name': project_name,
+            'project_type': project_type,
+            'industry': industry,
+            'methodology': methodology,
+            'document_type': document_type,
+            'file_format': data.get('file_format', 'docx')
+        }
         
-        # Call OpenAI API with optimized settings
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Fast, cost-effective model
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are an expert project management consultant. Create professional PM documents following PMI PMBOK standards. Be comprehensive yet concise."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000,  # Reduced from 3000 for speed, still sufficient for documents
-            stream=False
-        )
+        # Non-urgent generations go through the Batch API (half price, 24h window).
+        # They count against the quota once they succeed, so requests already
+        # queued hold back part of what is left.
+        if data.get('mode') == 'batch':
+            queued = AIGeneratorBatch.query.filter(
+                AIGeneratorBatch.user_id == current_user.id,
+                AIGeneratorBatch.status.in_(BATCH_QUEUED_STATUSES)
+            ).count()
+            if queued >= remaining:
+                return jsonify({
+                    'error': f'Your queued generations already use the rest of your AI generation limit ({limit} per month).',
+                    'upgrade_required': True,
+                    'remaining': 0,
+                    'limit': limit
+                }), 403
+            
+            batch = AIGeneratorBatch(
+                user_id=current_user.id,
+                created_at=datetime.utcnow(),
+                **generation
+            )
+            db.session.add(batch)
+            db.session.flush()  # assigns batch.id, used as the batch custom_id
+            
+            batch.batch_id = _submit_batch_generation(batch.id, prompt, document_type)
+            db.session.commit()
+            
+            return jsonify({
+                'success': True,
+                'status': 'queued',
+                'message': 'Document queued for generation. It will appear in your history when ready.',
+                'batch_request_id': batch.id,
+                'remaining': remaining - queued - 1,
+                'limit': limit
+            }), 202
         
-        generated_content = response.choices[0].message.content
+        # The prompt captures every input, so an identical prompt can reuse an
+        # earlier completion instead of calling OpenAI again
+        cache_key = response_cache.make_key(f"ai-generator:{document_type}", methodology, prompt)
+        generated_content = response_cache.get(cache_key)
         
-        # Create document file based on type
-        file_format = data.get('file_format', 'docx')
-        file_data, filename = create_document_file(
-            generated_content,
-            document_type,
-            project_name,
-            file_format
-        )
+        if data.get('mode') == 'stream':
+            # Forward tokens as Server-Sent Events while OpenAI produces them; the
+            # document is rendered and saved once the completion has finished
+            return Response(
+                stream_with_context(_stream_generation(prompt, cache_key, generated_content, generation, remaining, limit)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
         
-        # Track usage
-        current_user.ai_generations_this_month += 1
+        if generated_content is None:
+            # Call OpenAI API with optimized settings
+            response = client.chat.completions.create(**_completion_request(prompt, document_type), stream=False)
+            log_prompt_cache_usage(response, 'ai-generator')
+            
+            generated_content = response.choices[0].message.content
+            response_cache.set(cache_key, generated_content)
         
-        # Save generation history
-        history = AIGeneratorHistory(
-            user_id=current_user.id,
-            project_name=project_name,
-            project_type=project_type,
-            industry=industry,
-            methodology=methodology,
-            document_type=document_type,
-            file_format=file_format,
-            generated_content=generated_content[:5000],  # Store first 5000 chars
-            file_path=filename,
-            created_at=datetime.utcnow()
-        )
-        db.session.add(history)
-        db.session.commit()
+        history_id = _save_generation(current_user, generation, generated_content)
         
         # Return success with download link
-        return jsonify({
-            'success': True,
-            'message': 'Document generated successfully',
-            'history_id': history.id,
-            'download_url': url_for('ai_generator.download', history_id=history.id, _external=True),
-            'remaining': remaining - 1,
-            'limit': limit,
-            'preview': generated_content[:500] + '...'
-        })
+        return jsonify(_generation_result(history_id, generated_content, remaining, limit))
         
     except Exception as e:
         logger.error(f"AI generation error: {str(e)}")
@@ -163,6 +227,7 @@ Be thorough but concise."""
 @login_required
 def download(history_id):
     """Download generated document"""
+    from database import db
     from models import AIGeneratorHistory
     
     history = AIGeneratorHistory.query.get_or_404(history_id)
@@ -173,23 +238,42 @@ def download(history_id):
         return redirect(url_for('ai_generator.index'))
     
     try:
-        # Recreate the document file
-        file_data, filename = create_document_file(
-            history.generated_content,
-            history.document_type,
-            history.project_name,
-            history.file_format
-        )
+        filename = _document_filename(history.document_type, history.project_name, history.file_format)
+        
+        # Render once for rows without a stored file (older and batch generations,
+        # or a redeploy that wiped the disk), then serve the stored copy from then on
+        if not history.file_path or not os.path.isfile(history.file_path):
+            file_data, filename = create_document_file(
+                history.generated_content,
+                history.document_type,
+                history.project_name,
+                history.file_format
+            )
+            file_path = _write_generated_file(history.id, file_data, filename)
+            if file_path is None:
+                file_data.seek(0)
+                return send_file(
+                    file_data,
+                    as_attachment=True,
+                    download_name=filename,
+                    mimetype=get_mimetype(history.file_format)
+                )
+            history.file_path = file_path
+            db.session.commit()
         
+        # Streamed from disk; conditional=True derives the ETag and Last-Modified from
+        # the file, so repeat downloads get a 304, and also serves Range requests
         return send_file(
-            file_data,
+            history.file_path,
             as_attachment=True,
             download_name=filename,
-            mimetype=get_mimetype(history.file_format)
+            mimetype=get_mimetype(history.file_format),
+            conditional=True
         )
         
     except Exception as e:
         logger.error(f"Download error: {str(e)}")
+        db.session.rollback()
         flash('Error downloading file', 'error')
         return redirect(url_for('ai_generator.index'))
 
@@ -202,6 +286,9 @@ def history():
     page = request.args.get('page', 1, type=int)
     per_page = 20
     
+    # Pick up any queued generations that finished since the last visit
+    complete_pending_batches(current_user)
+    
     history_query = AIGeneratorHistory.query.filter_by(
         user_id=current_user.id
     ).order_by(AIGeneratorHistory.created_at.desc())
@@ -212,38 +299,249 @@ def history():
                          history=pagination.items,
                          pagination=pagination)
 
+def _save_generation(user, generation, generated_content):
+    """Render the document, save it to user's history and count it against their quota
+
+    Returns the new history row's id.
+    """
+    from database import db
+    from models import AIGeneratorHistory
+    
+    # Create document file based on type
+    file_data, filename = create_document_file(
+        generated_content,
+        generation['document_type'],
+        generation['project_name'],
+        generation['file_format']
+    )
+    
+    # Track usage
+    user.ai_generations_this_month += 1
+    
+    # Save generation history. The row is write-only here, so it is inserted with a
+    # Core INSERT ... RETURNING rather than built and flushed as an ORM object
+    history_id = db.session.execute(
+        insert(AIGeneratorHistory).values(
+            user_id=user.id,
+            generated_content=generated_content[:5000],  # Store first 5000 chars
+            created_at=datetime.utcnow(),
+            **generation
+        ).returning(AIGeneratorHistory.id)
+    ).scalar_one()
+    
+    # Keep the rendered file so downloads don't rebuild it
+    file_path = _write_generated_file(history_id, file_data, filename)
+    if file_path is not None:
+        db.session.execute(
+            update(AIGeneratorHistory).where(AIGeneratorHistory.id == history_id).values(file_path=file_path)
+        )
+    db.session.commit()
+    return history_id
+
+def _generation_result(history_id, generated_content, remaining, limit):
+    """Response payload for a finished generation"""
+    return {
+        'success': True,
+        'message': 'Document generated successfully',
+        'history_id': history_id,
+        'download_url': url_for('ai_generator.download', history_id=history_id, _external=True),
+        'remaining': remaining - 1,
+        'limit': limit,
+        'preview': generated_content[:500] + '...'
+    }
+
+def _stream_generation(prompt, cache_key, cached_content, generation, remaining, limit):
+    """
+    Server-Sent Events for a streamed generation: one `data: {"delta": ...}` frame per
+    chunk, then a terminal `event: done` frame with the same payload as the JSON
+    response (or `event: error` if generation fails)
+    """
+    from database import db
+    
+    buffer = []
+    try:
+        if cached_content is not None:
+            buffer.append(cached_content)
+            yield _sse({'delta': cached_content})
+        else:
+            stream = client.chat.completions.create(
+                **_completion_request(prompt, generation['document_type']),
+                stream=True,
+                stream_options={'include_usage': True}
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    buffer.append(chunk.choices[0].delta.content)
+                    yield _sse({'delta': chunk.choices[0].delta.content})
+                if chunk.usage:  # only the final chunk carries usage
+                    log_prompt_cache_usage(chunk, 'ai-generator')
+        
+        generated_content = ''.join(buffer)
+        if cached_content is None:
+            response_cache.set(cache_key, generated_content)
+        
+        history_id = _save_generation(current_user, generation, generated_content)
+        result = _generation_result(history_id, generated_content, remaining, limit)
+    except Exception as e:
+        logger.error(f"AI streaming generation error: {str(e)}")
+        db.session.rollback()
+        yield _sse({'error': 'An error occurred while generating the document. Please try again.'}, event='error')
+        return
+    
+    yield _sse(result, event='done')
+
+def _sse(payload, event=None):
+    """Format a Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {dumps(payload).decode('utf-8')}\n\n"
+
+def _completion_request(prompt, document_type):
+    """Chat completion parameters shared by real-time and batch generation"""
+    doc_key = document_type.lower()
+    return {
+        'model': MODEL_FOR_DOCUMENT.get(doc_key, DEFAULT_MODEL),
+        'messages': [
+            SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        'temperature': 0.2,  # structured documents, not creative writing
+        'max_tokens': MAX_TOKENS_FOR_DOCUMENT.get(doc_key, DEFAULT_MAX_TOKENS)
+    }
+
+def _submit_batch_generation(request_id, prompt, document_type):
+    """Submit one generation to the OpenAI Batch API and return the batch id"""
+    line = dumps({
+        'custom_id': str(request_id),
+        'method': 'POST',
+        'url': BATCH_ENDPOINT,
+        'body': _completion_request(prompt, document_type)
+    })
+    batch_file = client.files.create(file=('generation.jsonl', line + b'\n'), purpose='batch')
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window='24h'
+    )
+    logger.info(f"Queued AI generation {request_id} as batch {batch.id}")
+    return batch.id
+
+def _claim_batch_rows(rows):
+    """Move queued rows from 'pending' to 'processing' and return the ones this request won
+
+    The conditional UPDATE lets only one of several concurrent requests save a row.
+    """
+    from database import db
+    from models import AIGeneratorBatch
+    
+    claimed = {}
+    for custom_id, queued in rows.items():
+        result = db.session.execute(
+            update(AIGeneratorBatch)
+            .where(AIGeneratorBatch.id == queued.id, AIGeneratorBatch.status == 'pending')
+            .values(status='processing')
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed[custom_id] = queued
+    db.session.commit()
+    return claimed
+
+def complete_pending_batches(user):
+    """Save a user's queued generations whose OpenAI batch has finished
+
+    Succeeded requests become history rows (and count against the quota); failed,
+    expired or cancelled ones are only marked with that status. Each row is claimed
+    before it is saved, so concurrent requests never save or charge it twice.
+    """
+    from database import db
+    from models import AIGeneratorBatch
+    
+    pending = AIGeneratorBatch.query.filter_by(user_id=user.id, status='pending').all()
+    if not pending or not AI_ENABLED:
+        return
+    
+    by_batch = {}
+    for queued in pending:
+        by_batch.setdefault(queued.batch_id, {})[str(queued.id)] = queued
+    
+    for batch_id, rows in by_batch.items():
+        claimed = {}
+        try:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status != 'completed' and batch.status not in BATCH_FAILED_STATUSES:
+                continue
+            
+            claimed = _claim_batch_rows(rows)
+            rows = dict(claimed)
+            
+            if batch.status == 'completed' and batch.output_file_id:
+                output = client.files.content(batch.output_file_id).text
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    result = loads(line)
+                    queued = rows.pop(result.get('custom_id'), None)
+                    body = (result.get('response') or {}).get('body') or {}
+                    if queued is None:
+                        continue
+                    queued.completed_at = datetime.utcnow()
+                    if body.get('choices'):
+                        queued.status = 'completed'
+                        queued.history_id = _save_generation(
+                            user,
+                            {column: getattr(queued, column) for column in _GENERATION_COLUMNS},
+                            body['choices'][0]['message']['content']
+                        )  # commits
+                    else:
+                        queued.status = 'failed'
+                # Requests the output file has no line for failed inside the batch
+                for queued in rows.values():
+                    queued.status = 'failed'
+                    queued.completed_at = datetime.utcnow()
+            else:
+                for queued in rows.values():
+                    queued.status = batch.status
+                    queued.completed_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error checking AI batch {batch_id}: {str(e)}")
+            db.session.rollback()
+            # Release rows claimed but not finished, so a later visit retries them
+            if claimed:
+                db.session.execute(
+                    update(AIGeneratorBatch)
+                    .where(
+                        AIGeneratorBatch.id.in_([queued.id for queued in claimed.values()]),
+                        AIGeneratorBatch.status == 'processing'
+                    )
+                    .values(status='pending')
+                )
+                db.session.commit()
+
 def create_document_file(content, document_type, project_name, file_format):
     """Create document file from generated content"""
     
-    # Sanitize filename
-    safe_project_name = "".join(c for c in project_name if c.isalnum() or c in (' ', '-', '_')).strip()
-    safe_doc_type = "".join(c for c in document_type if c.isalnum() or c in (' ', '-', '_')).strip()
+    filename = _document_filename(document_type, project_name, file_format)
     
     if file_format == 'docx':
         # Create Word document
         doc = Document()
         doc.add_heading(f"{document_type}: {project_name}", 0)
         
-        # Split content into paragraphs
-        paragraphs = content.split('\n\n')
-        for para in paragraphs:
-            if para.strip():
-                # Check if it's a heading (starts with # or is all caps)
-                if para.strip().startswith('#'):
-                    heading_text = para.strip().lstrip('#').strip()
-                    doc.add_heading(heading_text, level=1)
-                elif para.strip().isupper() and len(para.strip()) < 100:
-                    doc.add_heading(para.strip(), level=2)
-                else:
-                    doc.add_paragraph(para.strip())
+        # Parse the whole body once and move its paragraphs in ahead of the
+        # section properties, rather than building each <w:p> with add_paragraph
+        body = doc.element.body
+        for p in list(parse_xml(_docx_body_xml(content))):
+            body.sectPr.addprevious(p)
         
         # Save to BytesIO
         file_data = io.BytesIO()
         doc.save(file_data)
         file_data.seek(0)
         
-        filename = f"{safe_project_name}_{safe_doc_type}.docx"
-        
     elif file_format == 'xlsx':
         # Create Excel workbook
         wb = Workbook()
@@ -267,18 +565,70 @@ def create_document_file(content, document_type, project_name, file_format):
         wb.save(file_data)
         file_data.seek(0)
         
-        filename = f"{safe_project_name}_{safe_doc_type}.xlsx"
-        
     else:  # txt
         file_data = io.BytesIO()
         file_data.write(f"{document_type}: {project_name}\n\n".encode('utf-8'))
         file_data.write(content.encode('utf-8'))
         file_data.seek(0)
-        
-        filename = f"{safe_project_name}_{safe_doc_type}.txt"
     
     return file_data, filename
 
+def _docx_body_xml(content):
+    """WordprocessingML paragraphs for generated content, wrapped in a <w:body>
+
+    Paragraphs are separated by blank lines. One starting with # becomes a
+    Heading 1, a short all-caps one a Heading 2, anything else a plain paragraph.
+    """
+    paragraphs = []
+    for para in content.split('\n\n'):
+        para = para.strip()
+        if not para:
+            continue
+        # Check if it's a heading (starts with # or is all caps)
+        if para.startswith('#'):
+            style, para = 'Heading1', para.lstrip('#').strip()
+        elif para.isupper() and len(para) < 100:
+            style = 'Heading2'
+        else:
+            style = None
+        ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+        paragraphs.append(f'<w:p>{ppr}<w:r>{_docx_run_xml(para)}</w:r></w:p>')
+    return f'<w:body {nsdecls("w")}>{"".join(paragraphs)}</w:body>'
+
+def _docx_run_xml(text):
+    """Run content for text, with tabs and line breaks as <w:tab/> and <w:br/> like python-docx"""
+    text = xml_escape(text).replace('\r', '\n')
+    lines = (
+        '<w:tab/>'.join(f'<w:t xml:space="preserve">{part}</w:t>' if part else '' for part in line.split('\t'))
+        for line in text.split('\n')
+    )
+    return '<w:br/>'.join(lines)
+
+def _document_filename(document_type, project_name, file_format):
+    """Download filename for a generated document"""
+    # Sanitize filename in one regex pass per part
+    safe_project_name = _UNSAFE_FILENAME_CHARS.sub('', project_name).strip()
+    safe_doc_type = _UNSAFE_FILENAME_CHARS.sub('', document_type).strip()
+    ext = file_format if file_format in ('docx', 'xlsx') else 'txt'
+    return f"{safe_project_name}_{safe_doc_type}.{ext}"
+
+def _write_generated_file(history_id, file_data, filename):
+    """Write a rendered document to GENERATED_DIR and return its path (None if the write fails)"""
+    ext = filename.rsplit('.', 1)[-1]
+    file_path = os.path.join(GENERATED_DIR, f"{history_id}.{ext}")
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    data = file_data.getvalue()
+    try:
+        os.makedirs(GENERATED_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)  # atomic, so a concurrent download never sees a partial file
+    except OSError as e:
+        logger.warning(f"Could not store generated document {history_id}: {e}")
+        return None
+    
+    return file_path
+
 def get_mimetype(file_format):
     """Get MIME type for file format"""
     mimetypes = {
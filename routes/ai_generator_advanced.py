@@ -11,39 +11,73 @@ import logging
 from datetime import datetime
 import tempfile
 import json
+from functools import lru_cache
 
 # Import knowledge bases
 from pmbok_2025_knowledge import pmbok_knowledge
 from methodology_knowledge import methodology_knowledge
 from pm_document_intelligence import pm_intelligence as pm_doc_intelligence
 from utils.subscription_security import check_ai_generation_limit
+from openai_client import log_prompt_cache_usage
+from ai_response_cache import response_cache
+from utils.prompt_text import normalize_prompt_text
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
 ai_gen_bp = Blueprint('ai_generator', __name__, url_prefix='/api/ai-generator')
 
-# Check if OpenAI API key is available
-OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-AI_ENABLED = OPENAI_API_KEY is not None
+# Invariant system message. It is sent first and byte-for-byte identical on every
+# call so OpenAI's automatic prompt-prefix caching can reuse it.
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """You are an expert Project Management consultant with deep knowledge of PMI PMBOK standards and all major PM methodologies. 
+                    
+You generate professional, comprehensive, and methodology-appropriate project management documents. 
 
-if AI_ENABLED:
-    try:
-        from openai import OpenAI
-        # Initialize with minimal config to avoid proxy issues
-        client = OpenAI(api_key=OPENAI_API_KEY, max_retries=3, timeout=30.0)
-        logger.info("OpenAI client initialized for AI Generator")
-    except Exception as e:
-        logger.warning(f"OpenAI client initialization warning: {e}")
-        # Try basic initialization
-        try:
-            client = OpenAI()
-            logger.info("OpenAI client initialized with default config")
-        except Exception as e2:
-            logger.debug(f"OpenAI init attempt: {e2}")
-            AI_ENABLED = False
+Your documents:
+- Follow PMI PMBOK standards
+- Adapt to the specified methodology (Scrum, Waterfall, SAFe, etc.)
+- Use methodology-appropriate terminology
+- Include realistic, contextual content
+- Are immediately usable by project managers
+- Follow professional formatting standards
+
+Generate complete, professional content that project managers can use directly."""
+}
+
+# The knowledge bases are static, so these lookups depend only on their (small,
+# frequently repeated) string arguments and are memoized per process. Callers
+# must treat the returned dicts as read-only.
+_analyze_document = lru_cache(maxsize=512)(pm_doc_intelligence.analyze_document_request)
+_adapt_to_methodology = lru_cache(maxsize=512)(methodology_knowledge.adapt_document_to_methodology)
+
+
+@lru_cache(maxsize=512)
+def _cached_methodology(method_key):
+    return methodology_knowledge.get_methodology(method_key)
+
+
+def _get_methodology(methodology):
+    """Methodology details by name; get_methodology is case-insensitive, so the cache key is lowercased"""
+    return _cached_methodology(methodology.lower())
+
+
+@lru_cache(maxsize=512)
+def _cached_knowledge_area(doc_key):
+    return pmbok_knowledge.get_knowledge_area_for_document(doc_key)
+
+
+def _get_knowledge_area(document_name):
+    """PMBOK knowledge area for a document; the lookup is case-insensitive, so the cache key is lowercased"""
+    return _cached_knowledge_area(document_name.lower())
+
+
+# Shared per-process OpenAI client, so generations reuse its pooled keep-alive
+# connections. with_options keeps that connection pool and only changes the
+# per-request retry and timeout settings this generator has always used.
+from openai_client import client as shared_client, AI_ENABLED
+client = shared_client.with_options(max_retries=3, timeout=30.0) if AI_ENABLED else None
 
 
 @ai_gen_bp.route('/analyze-request', methods=['POST'])
@@ -59,6 +93,9 @@ def analyze_document_request():
     }
     
     Returns document intelligence, format recommendation, and structure guidance
+    
+    Deprecated as a step of the full flow: /generate-full runs analysis, structure
+    and content generation in one request. Kept for backward compatibility.
     """
     try:
         data = request.get_json()
@@ -69,59 +106,16 @@ def analyze_document_request():
                 'error': 'Document name is required'
             }), 400
         
-        document_name = data.get('document_name', '')
-        project_context = data.get('project_context', '')
-        methodology = data.get('methodology', '')
-        
-        # Get document intelligence
-        doc_info = pm_doc_intelligence.analyze_document_request(document_name)
-        
-        # Infer methodology if not provided
-        if not methodology:
-            methodology = methodology_knowledge.get_methodology_for_document(
-                document_name, 
-                project_context
-            )
-        
-        # Get methodology details
-        method_info = methodology_knowledge.get_methodology(methodology)
-        
-        # Adapt document to methodology
-        adaptation = methodology_knowledge.adapt_document_to_methodology(
-            doc_info['category'],
-            methodology
+        analysis = _do_analyze(
+            document_name=data.get('document_name', ''),
+            project_context=data.get('project_context', ''),
+            methodology=data.get('methodology', '')
         )
         
-        # Get PMBOK mapping
-        pmbok_area = pmbok_knowledge.get_knowledge_area_for_document(document_name)
-        
-        return jsonify({
-            'success': True,
-            'document_intelligence': {
-                'name': document_name,
-                'category': doc_info['category'],
-                'recommended_format': doc_info['format'],
-                'purpose': doc_info.get('content_guidance', 'Professional project management document'),
-                'key_sections': doc_info['structure'],
-                'pmbok_knowledge_area': pmbok_area if pmbok_area else 'Project Integration Management',
-                'pmbok_process_group': 'Planning'
-            },
-            'methodology': {
-                'name': method_info['name'] if method_info else methodology,
-                'type': method_info['type'] if method_info else 'Unknown',
-                'formality': adaptation['formality'],
-                'detail_level': adaptation['detail_level'],
-                'terminology': adaptation['terminology']
-            },
-            'recommendations': {
-                'format': doc_info['format'],
-                'methodology': methodology,
-                'structure_guidance': adaptation['structure_guidance']
-            }
-        })
+        return jsonify({'success': True, **analysis})
     
     except Exception as e:
-        logger.error(f"Error analyzing document request: {e}")
+        logger.exception("Error analyzing document request: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -142,6 +136,8 @@ def generate_document_structure():
     }
     
     Returns detailed document structure ready for content generation
+    
+    Deprecated: use /generate-full. Kept for backward compatibility.
     """
     try:
         data = request.get_json()
@@ -162,26 +158,7 @@ def generate_document_structure():
                 'error': 'Document name is required'
             }), 400
         
-        # Get document intelligence
-        doc_info = pm_doc_intelligence.analyze_document_request(document_name)
-        
-        # Get methodology adaptation
-        adaptation = methodology_knowledge.adapt_document_to_methodology(
-            doc_info['category'],
-            methodology
-        )
-        
-        # Generate structure based on format
-        if format_type == 'excel':
-            structure = _generate_excel_structure(doc_info, adaptation, project_context)
-        elif format_type == 'word':
-            structure = _generate_word_structure(doc_info, adaptation, project_context)
-        elif format_type == 'powerpoint':
-            structure = _generate_powerpoint_structure(doc_info, adaptation, project_context)
-        elif format_type == 'visio':
-            structure = _generate_visio_structure(doc_info, adaptation, project_context)
-        else:
-            structure = _generate_word_structure(doc_info, adaptation, project_context)
+        structure = _do_structure(document_name, format_type, methodology, project_context)
         
         return jsonify({
             'success': True,
@@ -195,7 +172,7 @@ def generate_document_structure():
         })
     
     except Exception as e:
-        logger.error(f"Error generating structure: {e}")
+        logger.exception("Error generating structure: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -217,6 +194,8 @@ def generate_document_content():
     }
     
     Returns generated content ready for preview/edit
+    
+    Deprecated: use /generate-full. Kept for backward compatibility.
     """
     try:
         # Check AI generation limit
@@ -256,69 +235,95 @@ def generate_document_content():
                 'error': 'Document name is required'
             }), 400
         
-        # Get PM intelligence
-        doc_info = pm_doc_intelligence.analyze_document_request(document_name)
-        method_info = methodology_knowledge.get_methodology(methodology)
-        pmbok_info = pmbok_knowledge.get_knowledge_area_for_document(document_name)
-        
-        # Build comprehensive prompt with PM intelligence
-        prompt = _build_generation_prompt(
-            document_name=document_name,
-            format_type=format_type,
-            methodology=methodology,
-            project_context=project_context,
-            doc_info=doc_info,
-            method_info=method_info,
-            pmbok_info=pmbok_info,
-            structure=structure
-        )
+        content, metadata = _do_content(document_name, format_type, methodology, project_context, structure)
         
-        # Generate content with OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert Project Management consultant with deep knowledge of PMI PMBOK standards and all major PM methodologies. 
-                    
-You generate professional, comprehensive, and methodology-appropriate project management documents. 
+        return jsonify({
+            'success': True,
+            'content': content,
+            'metadata': metadata
+        })
+    
+    except Exception as e:
+        logger.exception("Error generating content: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
-Your documents:
-- Follow PMI PMBOK standards
-- Adapt to the specified methodology (Scrum, Waterfall, SAFe, etc.)
-- Use methodology-appropriate terminology
-- Include realistic, contextual content
-- Are immediately usable by project managers
-- Follow professional formatting standards
 
-Generate complete, professional content that project managers can use directly."""
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            max_tokens=3000,
-            temperature=0.7
-        )
+@ai_gen_bp.route('/generate-full', methods=['POST'])
+def generate_full_document():
+    """
+    Analyze the request, build the document structure and generate its content
+    in one round-trip (replaces calling /analyze-request, /generate-structure
+    and /generate-content in turn)
+    
+    Request body:
+    {
+        "document_name": "string",
+        "project_context": "string" (optional),
+        "methodology": "string" (optional, inferred when omitted),
+        "format": "word|excel|powerpoint|visio|auto" (optional, recommended format when omitted)
+    }
+    
+    Returns document intelligence, methodology, structure and generated content
+    """
+    try:
+        # Check AI generation limit
+        limit_check = check_ai_generation_limit(current_user if current_user.is_authenticated else None)
+        if not limit_check['allowed']:
+            return jsonify({
+                'success': False,
+                'error': limit_check['error'],
+                'upgrade_required': limit_check.get('upgrade_required', False),
+                'current_plan': limit_check.get('current_plan'),
+                'usage': limit_check.get('usage'),
+                'limit': limit_check.get('limit')
+            }), 403
         
-        generated_content = response.choices[0].message.content
+        if not AI_ENABLED:
+            return jsonify({
+                'success': False,
+                'error': 'AI generation is not available'
+            }), 503
+        
+        data = request.get_json()
+        
+        if not data or not data.get('document_name'):
+            return jsonify({
+                'success': False,
+                'error': 'Document name is required'
+            }), 400
+        
+        document_name = data['document_name']
+        project_context = data.get('project_context', '')
+        methodology = data.get('methodology', '')
+        
+        # Handle methodology as either string or dict
+        if isinstance(methodology, dict):
+            methodology = methodology.get('name', 'waterfall')
+        
+        analysis = _do_analyze(document_name, project_context, methodology)
+        
+        # Fall back to the analysis recommendations for anything not given
+        methodology = analysis['recommendations']['methodology']
+        format_type = data.get('format')
+        if not format_type or format_type == 'auto':
+            format_type = analysis['recommendations']['format']
+        
+        structure = _do_structure(document_name, format_type, methodology, project_context)
+        content, metadata = _do_content(document_name, format_type, methodology, project_context, structure)
         
         return jsonify({
             'success': True,
-            'content': generated_content,
-            'metadata': {
-                'document_name': document_name,
-                'format': format_type,
-                'methodology': methodology,
-                'pmbok_knowledge_area': pmbok_info if isinstance(pmbok_info, str) else pmbok_info.get('knowledge_area', 'Unknown'),
-                'generated_at': datetime.utcnow().isoformat(),
-                'tokens_used': response.usage.total_tokens
-            }
+            **analysis,
+            'structure': structure,
+            'content': content,
+            'metadata': metadata
         })
     
     except Exception as e:
-        logger.error(f"Error generating content: {e}")
+        logger.exception("Error generating full document: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -372,7 +377,7 @@ def preview_document():
         })
     
     except Exception as e:
-        logger.error(f"Error generating preview: {e}")
+        logger.exception("Error generating preview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -381,26 +386,184 @@ def preview_document():
 
 # ========== HELPER FUNCTIONS ==========
 
+def _do_analyze(document_name, project_context, methodology):
+    """Document intelligence, methodology and recommendations for a request"""
+    # Get document intelligence
+    doc_info = _analyze_document(document_name)
+    
+    # Infer methodology if not provided
+    if not methodology:
+        methodology = methodology_knowledge.get_methodology_for_document(
+            document_name, 
+            project_context
+        )
+    
+    # Get methodology details
+    method_info = _get_methodology(methodology)
+    
+    # Adapt document to methodology
+    adaptation = _adapt_to_methodology(
+        doc_info['category'],
+        methodology
+    )
+    
+    # Get PMBOK mapping
+    pmbok_area = _get_knowledge_area(document_name)
+    
+    return {
+        'document_intelligence': {
+            'name': document_name,
+            'category': doc_info['category'],
+            'recommended_format': doc_info['format'],
+            'purpose': doc_info.get('content_guidance', 'Professional project management document'),
+            'key_sections': doc_info['structure'],
+            'pmbok_knowledge_area': pmbok_area if pmbok_area else 'Project Integration Management',
+            'pmbok_process_group': 'Planning'
+        },
+        'methodology': {
+            'name': method_info['name'] if method_info else methodology,
+            'type': method_info['type'] if method_info else 'Unknown',
+            'formality': adaptation['formality'],
+            'detail_level': adaptation['detail_level'],
+            'terminology': adaptation['terminology']
+        },
+        'recommendations': {
+            'format': doc_info['format'],
+            'methodology': methodology,
+            'structure_guidance': adaptation['structure_guidance']
+        }
+    }
+
+
+def _do_structure(document_name, format_type, methodology, project_context):
+    """Document structure for the requested format"""
+    # Get document intelligence
+    doc_info = _analyze_document(document_name)
+    
+    # Get methodology adaptation
+    adaptation = _adapt_to_methodology(
+        doc_info['category'],
+        methodology
+    )
+    
+    # Generate structure based on format
+    if format_type == 'excel':
+        return _generate_excel_structure(doc_info, adaptation, project_context)
+    elif format_type == 'powerpoint':
+        return _generate_powerpoint_structure(doc_info, adaptation, project_context)
+    elif format_type == 'visio':
+        return _generate_visio_structure(doc_info, adaptation, project_context)
+    return _generate_word_structure(doc_info, adaptation, project_context)
+
+
+def _do_content(document_name, format_type, methodology, project_context, structure):
+    """Generated document content and its metadata"""
+    # Normalized once so the prompt and the response cache see the same context
+    project_context = normalize_prompt_text(project_context)
+    
+    # Get PM intelligence
+    pmbok_info = _get_knowledge_area(document_name)
+    
+    # Build comprehensive prompt with PM intelligence
+    prompt = _build_generation_prompt(
+        document_name=document_name,
+        format_type=format_type,
+        methodology=methodology,
+        project_context=project_context,
+        structure=structure
+    )
+    
+    # The prompt captures the document, format, methodology, project context and
+    # structure, so only an identical prompt reuses an earlier completion
+    cache_key = response_cache.make_key(f"generate-content:{document_name}", methodology, prompt)
+    generated_content = response_cache.get(cache_key)
+    cached = generated_content is not None
+    tokens_used = 0
+    
+    if not cached:
+        # Generate content with OpenAI
+        response = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            messages=[
+                SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            max_tokens=3000,
+            temperature=0.7
+        )
+        log_prompt_cache_usage(response, 'generate-content')
+        
+        generated_content = response.choices[0].message.content
+        tokens_used = response.usage.total_tokens
+        response_cache.set(cache_key, generated_content)
+    
+    return generated_content, {
+        'document_name': document_name,
+        'format': format_type,
+        'methodology': methodology,
+        'pmbok_knowledge_area': pmbok_info if isinstance(pmbok_info, str) else pmbok_info.get('knowledge_area', 'Unknown'),
+        'generated_at': datetime.utcnow().isoformat(),
+        'tokens_used': tokens_used,
+        'cached': cached
+    }
+
+
+# Default layouts for the structure generators. They are built once at import and
+# shared read-only by every response (jsonify serializes the tuples as arrays).
+_DEFAULT_EXCEL_COLUMNS = ('ID', 'Description', 'Owner', 'Status', 'Priority', 'Notes')
+_EXCEL_FORMATTING = {
+    'header_style': 'bold',
+    'freeze_panes': 'A2',
+    'auto_filter': True
+}
+
+_DEFAULT_WORD_SECTIONS = (
+    'Executive Summary', 'Introduction', 'Objectives', 'Scope', 'Deliverables',
+    'Timeline', 'Resources', 'Risks', 'Conclusion'
+)
+_WORD_FORMATTING = {
+    'heading_1': 'Title',
+    'heading_2': 'Section',
+    'heading_3': 'Subsection',
+    'body': 'Normal'
+}
+_WORD_PAGE_SETUP = {
+    'margins': '1 inch',
+    'orientation': 'portrait'
+}
+
+_DEFAULT_POWERPOINT_SLIDES = (
+    {'title': 'Title Slide', 'layout': 'title'},
+    {'title': 'Agenda', 'layout': 'content'},
+    {'title': 'Overview', 'layout': 'content'},
+    {'title': 'Key Points', 'layout': 'bullets'},
+    {'title': 'Next Steps', 'layout': 'bullets'},
+    {'title': 'Questions', 'layout': 'title'}
+)
+
+_DEFAULT_VISIO_ELEMENTS = ('Start', 'Process', 'Decision', 'End')
+
+
+def _structure_part(doc_info, key, default):
+    """Part of doc_info's structure, which is a list (used as-is) or a dict keyed by part"""
+    structure = doc_info.get('structure') or {}
+    if isinstance(structure, list):
+        return structure
+    return structure.get(key, default)
+
+
 def _generate_excel_structure(doc_info, adaptation, context):
     """Generate Excel spreadsheet structure"""
-    # Handle structure as list or dict
-    structure = doc_info.get('structure', [])
-    if isinstance(structure, list):
-        columns = structure if structure else ['ID', 'Description', 'Owner', 'Status', 'Priority', 'Notes']
-    else:
-        columns = structure.get('columns', ['ID', 'Description', 'Owner', 'Status', 'Priority', 'Notes'])
-    
     return {
         'type': 'excel',
         'sheets': [
             {
                 'name': doc_info['category'].title(),
-                'columns': columns,
-                'formatting': {
-                    'header_style': 'bold',
-                    'freeze_panes': 'A2',
-                    'auto_filter': True
-                }
+                'columns': _structure_part(doc_info, 'columns', _DEFAULT_EXCEL_COLUMNS),
+                'formatting': _EXCEL_FORMATTING
             }
         ],
         'formulas': [],
@@ -410,41 +573,22 @@ def _generate_excel_structure(doc_info, adaptation, context):
 
 def _generate_word_structure(doc_info, adaptation, context):
     """Generate Word document structure"""
-    # Handle structure as list or dict
-    structure = doc_info.get('structure', [])
-    if isinstance(structure, list):
-        sections = structure if structure else ['Executive Summary', 'Introduction', 'Objectives', 'Scope', 'Deliverables', 'Timeline', 'Resources', 'Risks', 'Conclusion']
-    else:
-        sections = structure.get('sections', ['Executive Summary', 'Introduction', 'Objectives', 'Scope', 'Deliverables', 'Timeline', 'Resources', 'Risks', 'Conclusion'])
-    
     return {
         'type': 'word',
-        'sections': sections,
-        'formatting': {
-            'heading_1': 'Title',
-            'heading_2': 'Section',
-            'heading_3': 'Subsection',
-            'body': 'Normal'
-        },
-        'page_setup': {
-            'margins': '1 inch',
-            'orientation': 'portrait'
-        }
+        'sections': _structure_part(doc_info, 'sections', _DEFAULT_WORD_SECTIONS),
+        'formatting': _WORD_FORMATTING,
+        'page_setup': _WORD_PAGE_SETUP
     }
 
 
 def _generate_powerpoint_structure(doc_info, adaptation, context):
     """Generate PowerPoint presentation structure"""
+    # A list structure holds slide titles only, so it falls back to the default slides
+    structure = doc_info.get('structure')
+    slides = structure.get('slides', _DEFAULT_POWERPOINT_SLIDES) if isinstance(structure, dict) else _DEFAULT_POWERPOINT_SLIDES
     return {
         'type': 'powerpoint',
-        'slides': doc_info['structure'].get('slides', [
-            {'title': 'Title Slide', 'layout': 'title'},
-            {'title': 'Agenda', 'layout': 'content'},
-            {'title': 'Overview', 'layout': 'content'},
-            {'title': 'Key Points', 'layout': 'bullets'},
-            {'title': 'Next Steps', 'layout': 'bullets'},
-            {'title': 'Questions', 'layout': 'title'}
-        ]),
+        'slides': slides,
         'theme': 'professional',
         'master_slide': 'default'
     }
@@ -452,26 +596,47 @@ def _generate_powerpoint_structure(doc_info, adaptation, context):
 
 def _generate_visio_structure(doc_info, adaptation, context):
     """Generate Visio diagram structure"""
+    structure = doc_info.get('structure')
+    diagram_type = structure.get('diagram_type', 'flowchart') if isinstance(structure, dict) else 'flowchart'
     return {
         'type': 'visio',
-        'diagram_type': doc_info['structure'].get('diagram_type', 'flowchart'),
-        'elements': doc_info['structure'].get('elements', [
-            'Start', 'Process', 'Decision', 'End'
-        ]),
+        'diagram_type': diagram_type,
+        'elements': _structure_part(doc_info, 'elements', _DEFAULT_VISIO_ELEMENTS),
         'layout': 'hierarchical',
         'connectors': 'arrows'
     }
 
 
-def _build_generation_prompt(document_name, format_type, methodology, project_context, 
-                             doc_info, method_info, pmbok_info, structure):
-    """Build comprehensive prompt with all PM intelligence"""
-    
-    prompt = f"""Generate a professional {document_name} for the following project:
+def _build_generation_prompt(document_name, format_type, methodology, project_context, structure):
+    """
+    Build comprehensive prompt with all PM intelligence.
 
-**Project Context:**
+    Sections that depend only on the document type and methodology come first and
+    the per-request project context and structure come last, so requests for the
+    same document type share the longest possible cacheable prefix.
+    """
+    return f"""{_prompt_prefix(document_name, format_type, methodology)}**Project Context:**
 {project_context}
 
+**Required Structure:**
+{json.dumps(structure, separators=(',', ':'))}
+
+Generate the complete {document_name} now:"""
+
+
+@lru_cache(maxsize=256)
+def _prompt_prefix(document_name, format_type, methodology):
+    """
+    The invariant part of the generation prompt for a document, format and
+    methodology. It depends only on the (static) knowledge bases, so each
+    combination is rendered once per process.
+    """
+    doc_info = _analyze_document(document_name)
+    method_info = _get_methodology(methodology)
+    pmbok_info = _get_knowledge_area(document_name)
+    
+    return f"""Generate a professional {document_name}.
+
 **Document Requirements:**
 - Format: {format_type.upper()}
 - Methodology: {methodology} ({method_info['type'] if method_info else 'Traditional'})
@@ -486,9 +651,6 @@ def _build_generation_prompt(document_name, format_type, methodology, project_co
 - Detail Level: {method_info['document_characteristics']['detail_level'] if method_info else 'Comprehensive'}
 - Documentation Volume: {method_info['document_characteristics']['documentation_volume'] if method_info else 'Moderate'}
 
-**Required Structure:**
-{json.dumps(structure, indent=2)}
-
 **Instructions:**
 1. Use {methodology}-appropriate terminology and language
 2. Follow PMI PMBOK standards for {pmbok_info if isinstance(pmbok_info, str) else pmbok_info.get('knowledge_area', 'Unknown')}
@@ -498,9 +660,7 @@ def _build_generation_prompt(document_name, format_type, methodology, project_co
 6. Include all standard sections for a {document_name}
 7. Be specific, actionable, and comprehensive
 
-Generate the complete {document_name} now:"""
-    
-    return prompt
+"""
 
 
 def _format_preview(content, format_type, document_name):
@@ -561,8 +721,8 @@ def download_document():
         from document_generator import document_generator
         
         data = request.get_json()
-        logger.info(f"Download request data keys: {list(data.keys()) if data else 'None'}")
-        logger.info(f"Download request data: {str(data)[:200]}...") # Log first 200 chars
+        logger.info("Download request data keys: %s", list(data) if data else None)
+        logger.info("Download request data: %.200s...", data)  # Log first 200 chars
         
         content = data.get('content', '')
         document_name = data.get('document_name', 'PM_Document')
@@ -570,11 +730,11 @@ def download_document():
         structure = data.get('structure', {})
         metadata = data.get('metadata', {})
         
-        logger.info(f"Content length: {len(content) if content else 0}")
-        logger.info(f"Document name: {document_name}, Format: {format_type}")
+        logger.info("Content length: %d", len(content) if content else 0)
+        logger.info("Document name: %s, Format: %s", document_name, format_type)
         
         if not content:
-            logger.error(f"Content is empty! Data received: {data}")
+            logger.error("Content is empty! Data received: %s", data)
             return jsonify({'success': False, 'error': 'Content is required'}), 400
         
         # Add user info
@@ -594,5 +754,5 @@ def download_document():
         return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
         
     except Exception as e:
-        logger.error(f"Error downloading document: {e}")
+        logger.exception("Error downloading document: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
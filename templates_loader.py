@@ -0,0 +1,69 @@
+"""
+Template Catalog Loader
+Shared row construction for the populate scripts
+"""
+import json
+import os
+from contextlib import contextmanager
+from multiprocessing import Pool
+from operator import itemgetter
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates_catalog.json")
+
+# Catalogs larger than this build rows in a process pool; below it the
+# pool start-up costs more than it saves
+PARALLEL_THRESHOLD = 5000
+PARALLEL_CHUNKSIZE = 500
+
+# Keys every catalog entry carries; fetched in a single C-level call per row
+_required = itemgetter("id", "name", "filename", "industry", "category")
+
+
+def build_template_row(template_data):
+    """Map a catalog entry to a dict of Template column values"""
+    id_, name, filename, industry, category = _required(template_data)
+    return {
+        "id": id_,
+        "name": name,
+        "description": template_data.get("description", ""),
+        "industry": industry,
+        "category": category,
+        "file_format": template_data.get("file_type", "xlsx"),
+        "file_path": filename,
+    }
+
+
+def iter_template_rows(path=DEFAULT_CATALOG_PATH):
+    """Yield Template row dicts for every entry in the catalog at path"""
+    with open(path, "r") as f:
+        templates = json.load(f)
+
+    if len(templates) > PARALLEL_THRESHOLD:
+        # Row order is irrelevant to the insert, so take results as they land
+        with Pool() as pool:
+            yield from pool.imap_unordered(build_template_row, templates, chunksize=PARALLEL_CHUNKSIZE)
+        return
+
+    for template_data in templates:
+        yield build_template_row(template_data)
+
+
+@contextmanager
+def sqlite_bulk_load(conn):
+    """Relax SQLite durability pragmas on conn for the duration of a bulk load
+
+    The previous settings are restored on exit. Other backends are left alone.
+    """
+    if conn.dialect.name != "sqlite":
+        yield conn
+        return
+
+    synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+    journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+    conn.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+    try:
+        yield conn
+    finally:
+        conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+        conn.exec_driver_sql(f"PRAGMA synchronous={synchronous}")
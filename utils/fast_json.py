@@ -0,0 +1,44 @@
+"""
+Fast JSON helpers for admin and API routes
+Uses orjson when it is installed and falls back to the standard library otherwise
+"""
+
+from flask import current_app
+
+try:
+    import orjson
+
+    def loads(data):
+        """Parse JSON from str or bytes"""
+        return orjson.loads(data)
+
+    def dumps(obj):
+        """Serialize to JSON bytes"""
+        return orjson.dumps(obj)
+except ImportError:
+    import json
+
+    def loads(data):
+        """Parse JSON from str or bytes"""
+        return json.loads(data)
+
+    def dumps(obj):
+        """Serialize to JSON bytes"""
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def load_file(path):
+    """Parse a JSON file in one read"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def request_json(request):
+    """Parse the request body, or return None if it is empty"""
+    data = request.get_data()
+    return loads(data) if data else None
+
+
+def ojsonify(obj):
+    """jsonify() replacement that serializes with the fast encoder"""
+    return current_app.response_class(dumps(obj), mimetype='application/json')
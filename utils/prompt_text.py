@@ -0,0 +1,20 @@
+"""
+Prompt text helpers for the AI generators
+Normalizes free-text user input before it is embedded in a prompt, so stray
+whitespace and oversized pastes don't cost prompt tokens
+"""
+
+import re
+
+# Longest free-text field embedded in a prompt
+MAX_PROMPT_TEXT_CHARS = 1500
+
+_WHITESPACE_RE = re.compile(r'[^\S\n]+')
+
+
+def normalize_prompt_text(text, max_chars=MAX_PROMPT_TEXT_CHARS):
+    """Collapse runs of spaces, drop blank lines, strip each line and truncate to max_chars"""
+    if not text:
+        return ''
+    lines = (_WHITESPACE_RE.sub(' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)[:max_chars].rstrip()